@@ -11,6 +11,8 @@ export type RoomUpdate = {
   current_to: string | null;
   current_bet: number;
   turn_deadline?: number | null; // unix seconds
+  deck_commit?: string | null;   // sha256 of the shuffle seed, revealed in 'showdown'
+  seq?: number;                  // room_delta sequence this snapshot is at
 };
 
 export type PlayerUpdate = {
@@ -24,8 +26,44 @@ export type PlayerUpdate = {
   current_bet: number;
   turn_deadline?: number | null;
   allowed_actions: Allowed;
+  seq?: number;                  // player_delta sequence this snapshot is at
 };
 
+// Incremental updates: only the fields that changed since seq - 1.
+export type RoomDelta = { seq: number; changes: Partial<RoomUpdate> };
+export type PlayerDelta = { seq: number; changes: Partial<Pick<PlayerUpdate, 'your_cards' | 'allowed_actions'>> };
+
+// Multi-table tournaments: 'tournament' after each hand and on 'tournament_state',
+// 'seated' whenever the player is given a (new) table to join.
+export type TournamentUpdate = {
+  tournament: string;
+  players: number;
+  players_left: number;
+  tables: number;
+  started: boolean;
+  finished: boolean;
+  entries?: string[];            // before the start: who registered
+  level?: number;
+  small_blind?: number;
+  big_blind?: number;
+  next_level_in?: number;        // seconds
+  top?: { name: string; chips: number }[];
+  ranks?: Record<string, number>; // sid -> place on the leaderboard
+  places?: { place: number; name: string }[];   // once finished
+  token?: string;                // in the reply to register_tournament: the rejoin token
+};
+
+// an unstarted tournament expired, or every player left a started one
+export type TournamentClosed = { tournament: string };
+
+// token: kept to take the seat back from a new connection (join_room { token })
+export type Seated = { tournament: string; room: string; chips: number; token: string };
+
+export type Joined = { room: string; name: string; chips: number; token: string | null };
+
+// the server dropped the table: 'lru' (too many tables), 'idle' or 'stale'
+export type RoomClosed = { room: string; reason: string };
+
 export type GameSnapshot = {
   pub: RoomUpdate | null;
   priv: PlayerUpdate | null;
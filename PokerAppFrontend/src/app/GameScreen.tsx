@@ -1,7 +1,7 @@
 import React, { useEffect, useMemo, useRef, useState } from 'react';
 import { View, Text, StyleSheet, ScrollView, Alert } from 'react-native';
 import { useLocalSearchParams } from './expo-router';
-import type { Allowed, PlayerUpdate, RoomUpdate } from '../lib/types';
+import type { Allowed, Joined, PlayerDelta, PlayerUpdate, RoomClosed, RoomDelta, RoomUpdate } from '../lib/types';
 import { createSocket } from '../lib/socket';
 import Card from '../components/Card';
 import GameStatus from '../components/GameStatus';
@@ -12,6 +12,9 @@ export default function GameScreen() {
   const { name, room } = useLocalSearchParams<{ name: string; room?: string }>();
 
   const socketRef = useRef<Socket | null>(null);
+  // last applied delta seq per stream; null until the first snapshot arrives
+  const pubSeqRef = useRef<number | null>(null);
+  const privSeqRef = useRef<number | null>(null);
 
   const [pub, setPub] = useState<RoomUpdate | null>(null);
   const [priv, setPriv] = useState<PlayerUpdate | null>(null);
@@ -37,14 +40,49 @@ export default function GameScreen() {
     const s = createSocket();
     socketRef.current = s;
 
-    const onConnect = () => setMySid(s.id);
+    let joinedRoom = room || '';
+    // the seat's rejoin token: a new connection shows it to take the seat back
+    let token: string | null = null;
+    let connected = false;
+    const onConnect = () => {
+      setMySid(s.id);
+      if (connected && joinedRoom) s.emit('join_room', { room: joinedRoom, name: name || 'Player', token });
+      connected = true;
+    };
     const onRoomCreated = (d: any) => {
+      joinedRoom = d.room;
       setRoomCode(d.room);
       s.emit('join_room', { room: d.room, name: name || 'Player' });
     };
-    const onJoined = (_: any) => {};
-    const onRoomUpdate = (state: RoomUpdate) => { setPub(state); setInFlight(false); };
+    const onJoined = (d: Joined) => { if (d.token) token = d.token; };
+    const onRoomUpdate = (state: RoomUpdate) => {
+      pubSeqRef.current = state.seq ?? null;
+      setPub(state);
+      setInFlight(false);
+    };
+    // apply a delta if it is the next one; ask for snapshots on a gap
+    const accept = (ref: { current: number | null }, seq: number) => {
+      if (ref.current === null || seq <= ref.current) return false;
+      if (seq !== ref.current + 1) {
+        ref.current = null;
+        s.emit('resync', { room: joinedRoom });
+        return false;
+      }
+      ref.current = seq;
+      return true;
+    };
+    const onRoomDelta = (d: RoomDelta) => {
+      if (!accept(pubSeqRef, d.seq)) return;
+      setPub(p => (p ? { ...p, ...d.changes } : p));
+      setInFlight(false);
+    };
+    const onPlayerDelta = (d: PlayerDelta) => {
+      if (!accept(privSeqRef, d.seq)) return;
+      setPriv(p => (p ? { ...p, ...d.changes } : p));
+      setInFlight(false);
+    };
     const onPlayerUpdate = (state: PlayerUpdate) => {
+      privSeqRef.current = state.seq ?? null;
       setPriv(state);
       // keep pub in sync for shared fields
       setPub(p => ({
@@ -59,6 +97,11 @@ export default function GameScreen() {
       }));
       setInFlight(false);
     };
+    const onRoomClosed = (d: RoomClosed) => {
+      joinedRoom = '';   // nothing to rejoin
+      setInFlight(false);
+      Alert.alert('Table closed', `The server closed table ${d.room} (${d.reason}).`);
+    };
     const onError = (e: any) => { console.warn('socket error', e?.message || e); setInFlight(false); };
 
     s.on('connect', onConnect);
@@ -66,6 +109,9 @@ export default function GameScreen() {
     s.on('joined', onJoined);
     s.on('room_update', onRoomUpdate);
     s.on('player_update', onPlayerUpdate);
+    s.on('room_delta', onRoomDelta);
+    s.on('player_delta', onPlayerDelta);
+    s.on('room_closed', onRoomClosed);
     s.on('error', onError);
     s.on('connect_error', onError);
 
@@ -82,6 +128,9 @@ export default function GameScreen() {
       s.off('joined', onJoined);
       s.off('room_update', onRoomUpdate);
       s.off('player_update', onPlayerUpdate);
+      s.off('room_delta', onRoomDelta);
+      s.off('player_delta', onPlayerDelta);
+      s.off('room_closed', onRoomClosed);
       s.off('error', onError);
       s.off('connect_error', onError);
       s.disconnect();
@@ -137,7 +186,7 @@ export default function GameScreen() {
         {(pub?.community || []).map((c, i) => <Card key={i} card={c} />)}
       </View>
 
-      <Text style={styles.small}>Your chips: {priv?.players.find(x => x.sid === mySid)?.chips ?? 0}</Text>
+      <Text style={styles.small}>Your chips: {pub?.players.find(x => x.sid === mySid)?.chips ?? 0}</Text>
       <View style={styles.cardsRow}>
         {(priv?.your_cards || []).map((c, i) => <Card key={i} card={c} />)}
       </View>
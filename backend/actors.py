@@ -0,0 +1,61 @@
+# actors.py
+# Per-room serialization: every event touching a table goes through that
+# table's RoomActor, a FIFO mailbox drained by one thread at a time.
+#
+# There is no thread per room: whichever caller finds the mailbox idle drains
+# it (its own event plus anything queued meanwhile); later callers just
+# enqueue and return. Events of one table therefore run strictly in submit
+# order, while different tables run in parallel with no shared lock.
+#
+# A caller that is itself draining a table (an event posting to another
+# table, e.g. a tournament moving a player) never drains a second one: the
+# other mailbox gets a runner of its own from `spawn`, so events never nest
+# and per-thread state of the running event stays its own. Threads that
+# serve every table (the timer wheel, a broker listener) are started
+# through shared() and count as draining for good: a mailbox they post to
+# gets a runner too, so one slow table never holds up the rest.
+import threading, traceback
+from collections import deque
+
+_draining = threading.local()
+
+def shared(fn):
+    # fn, run on a thread that posts to many tables but drains none inline
+    def run(*args):
+        _draining.on = True
+        return fn(*args)
+    return run
+
+class RoomActor:
+    __slots__ = ('queue', 'lock', 'running', 'spawn')
+
+    def __init__(self, spawn):
+        self.queue = deque()
+        self.lock = threading.Lock()
+        self.running = False
+        self.spawn = spawn   # spawn(fn): run fn on a background thread/task
+
+    def submit(self, fn, *args):
+        with self.lock:
+            self.queue.append((fn, args))
+            if self.running: return
+            self.running = True
+        if getattr(_draining, 'on', False): self.spawn(self.drain)
+        else: self.drain()
+
+    def drain(self):
+        was = getattr(_draining, 'on', False)
+        _draining.on = True
+        try:
+            while True:
+                with self.lock:
+                    if not self.queue:
+                        self.running = False
+                        return
+                    fn, args = self.queue.popleft()
+                try:
+                    fn(*args)
+                except Exception:
+                    traceback.print_exc()
+        finally:
+            _draining.on = was
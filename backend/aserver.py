@@ -0,0 +1,189 @@
+# aserver.py
+# Asyncio transport: python-socketio AsyncServer as an ASGI app.
+#
+#   uvicorn aserver:app --host 0.0.0.0 --port 5000     (or: python aserver.py)
+#
+# Same events, payloads and env settings as server.py; the game is the same
+# tables.py code. Handlers, turn timers and broadcasts all run on the one
+# event loop, so an idle connection costs a socket and no thread. Per room,
+# events are serialized by an asyncio.Lock and their emits are sent in
+# order before the next event of that table starts.
+import os, json, asyncio, threading
+import socketio
+import tables, metrics
+from tables import (rooms, router, dispatch, make_room, handle_join, handle_leave,
+                    handle_start, handle_action, handle_equity, send_snapshot)
+
+PORT = int(os.getenv('PORT', 5000))
+
+# same channel as Flask-SocketIO, so threaded and async workers can share a queue
+mgr = socketio.AsyncRedisManager(tables.MESSAGE_QUEUE, channel='flask-socketio') \
+      if tables.MESSAGE_QUEUE else None
+sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*', client_manager=mgr)
+
+class AsyncTransport:
+    def __init__(self):
+        self.loop = None
+        self.thread = None  # the loop's thread
+        self.locks = {}     # room -> asyncio.Lock
+        self.batch = None   # emits of the event running now, sent after it
+        self.waiting = 0    # submitted events not finished yet
+
+    def open(self, room):
+        self.locks[room] = asyncio.Lock()
+
+    def close(self, room):
+        self.locks.pop(room, None)
+
+    def submit(self, room, fn, *args):
+        if threading.current_thread() is not self.thread:   # equity results
+            self.loop.call_soon_threadsafe(self.submit, room, fn, *args); return
+        self.waiting += 1
+        self.loop.create_task(self._run(room, fn, args))
+
+    async def _run(self, room, fn, args):
+        try:
+            lock = self.locks.get(room)
+            if lock is None: return
+            async with lock:
+                self.batch = batch = []
+                try:
+                    fn(*args)   # synchronous: no other event interleaves
+                finally:
+                    self.batch = None
+                for event, payload, to in batch:
+                    await sio.emit(event, payload, to=to)
+        finally:
+            self.waiting -= 1
+
+    def send(self, event, payload, to):
+        if self.batch is not None: self.batch.append((event, payload, to))
+        else: self.loop.create_task(sio.emit(event, payload, to=to))
+
+    def schedule(self, delay, fn, *args):
+        return self.loop.call_later(delay, fn, *args)
+
+    def cancel(self, handle):
+        if handle: handle.cancel()
+
+    def spawn(self, fn, *args):
+        # equity simulation: numpy work in the default executor
+        fut = self.loop.run_in_executor(None, fn, *args)
+        fut.add_done_callback(lambda f: f.exception() and print('spawn failed:', f.exception()))
+
+    def queued(self):
+        return self.waiting
+
+transport = AsyncTransport()
+tables.bind(transport)
+
+# ------------------------------------------------------------
+# Socket events
+# ------------------------------------------------------------
+@sio.event
+async def connect(sid, environ, auth=None):
+    metrics.connected.inc()
+
+@sio.event
+async def disconnect(sid, *_):
+    metrics.connected.dec()
+    tables.disconnected(sid)   # its seats are reaped after AWAY_GRACE
+
+def client_addr(sid):
+    return (sio.get_environ(sid) or {}).get('REMOTE_ADDR')
+
+@sio.on('create_room')
+async def on_create(sid, _=None):
+    if not tables.admit('create_room', sid, addr=client_addr(sid)): return
+    room = make_room()
+    await sio.emit('room_created', {'room': room}, to=sid)
+
+@sio.on('join_room')
+async def on_join(sid, data):
+    room = data.get('room')
+    if not tables.admit('join_room', sid, room): return
+    if router.owns(room) and room not in rooms:
+        await sio.emit('error', {'message': 'Room not found'}, to=sid); return
+    await sio.enter_room(sid, room)  # socket room membership lives with the connection
+    tables.joined(sid, room)
+    dispatch(room, handle_join, sid, data)
+
+@sio.on('resync')
+async def on_resync(sid, data):
+    if not tables.admit('resync', sid, data.get('room')): return
+    dispatch(data.get('room'), send_snapshot, sid)
+
+@sio.on('leave_room')
+async def on_leave(sid, data):
+    room = data.get('room')
+    if not tables.admit('leave_room', sid, room): return
+    dispatch(room, handle_leave, sid)
+    await sio.leave_room(sid, room)
+    tables.left(sid, room)
+
+@sio.on('start_hand')
+async def on_start(sid, data):
+    if not tables.admit('start_hand', sid, data.get('room')): return
+    dispatch(data.get('room'), handle_start, sid)
+
+@sio.on('request_equity')
+async def on_equity(sid, data):
+    if not tables.admit('request_equity', sid, data.get('room')): return
+    dispatch(data.get('room'), handle_equity, sid)
+
+@sio.on('player_action')
+async def on_action(sid, data):
+    if not tables.admit('player_action', sid, data.get('room')): return
+    dispatch(data.get('room'), handle_action, sid, data)
+
+@sio.on('create_tournament')
+async def on_create_tournament(sid, data=None):
+    if not tables.admit('create_tournament', sid, addr=client_addr(sid)): return
+    tables.create_tournament(sid, data or {})
+
+@sio.on('register_tournament')
+async def on_register_tournament(sid, data):
+    if not tables.admit('register_tournament', sid): return
+    tables.register_tournament(sid, data)
+
+@sio.on('start_tournament')
+async def on_start_tournament(sid, data):
+    if not tables.admit('start_tournament', sid): return
+    tables.start_tournament(sid, data)
+
+@sio.on('tournament_state')
+async def on_tournament_state(sid, data):
+    if not tables.admit('tournament_state', sid): return
+    tables.tournament_state(sid, data)
+
+# ------------------------------------------------------------
+# HTTP (health, /emits, /metrics) and startup
+# ------------------------------------------------------------
+async def http(scope, receive, send):
+    if scope['type'] != 'http': return
+    if scope['path'] == '/emits':
+        body, ctype = json.dumps(tables.emit_report()).encode(), b'application/json'
+    elif scope['path'] == '/metrics':
+        body, ctype = metrics.render().encode(), metrics.CONTENT_TYPE.encode()
+    else:
+        body, ctype = b'OK', b'text/plain'
+    await send({'type': 'http.response.start', 'status': 200,
+                'headers': [(b'content-type', ctype)]})
+    await send({'type': 'http.response.body', 'body': body})
+
+async def startup():
+    transport.loop = asyncio.get_running_loop()
+    transport.thread = threading.current_thread()
+    # forwarded events arrive on the broker's listener thread
+    router.start(lambda room, name, args: transport.loop.call_soon_threadsafe(
+                     tables.on_forwarded, room, name, args),
+                 lambda fn: threading.Thread(target=fn, daemon=True).start())
+    tables.start()
+
+app = socketio.ASGIApp(sio, other_asgi_app=http, on_startup=startup,
+                       on_shutdown=tables.hand_writer.close)
+
+if __name__ == '__main__':
+    import uvicorn
+    print(f'>>> POKER SERVER (asyncio) worker {tables.WORKER_ID}/{tables.NUM_WORKERS} <<<')
+    uvicorn.run(app, host='0.0.0.0', port=PORT)
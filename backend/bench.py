@@ -0,0 +1,100 @@
+# bench.py
+# Headless load test of the game engine: scripted bots play hands at full
+# speed, no sockets, no timers. Reports hands/sec, actions/sec, act()
+# latency percentiles and allocation counts.
+#
+#   python bench.py --hands 1000000 --players 6 --policy mixed
+#   python bench.py --hands 20000 --tracemalloc      # slower, adds peak bytes
+import argparse, gc, random, sys, time, tracemalloc
+from deck import shuffle, SEED_BYTES
+from engine import STARTING_CHIPS, BIG_BLIND, Room, add_player, start_hand, act, compute_allowed_actions
+from preflop import vs_random
+
+# --------- bots: (room, sid, allowed actions, rng) -> (action, amount) ----------
+RAISE_CAP = 8*BIG_BLIND   # per street: rebuys keep adding chips, so uncapped raising never ends
+TIGHT     = 0.55          # preflop equity vs a random hand the tight bot plays on (about 1 hand in 3)
+
+def bot_random(r, sid, allowed, rng):
+    action = rng.choice([a for a,ok in allowed.items()
+                         if ok and (a != 'raise' or r.current_bet < RAISE_CAP)])
+    return action, rng.randint(1, 3*BIG_BLIND) if action == 'raise' else 0
+
+def bot_station(r, sid, allowed, rng):
+    return ('check' if allowed['check'] else 'call'), 0
+
+def bot_aggressive(r, sid, allowed, rng):
+    if allowed['raise'] and r.current_bet < RAISE_CAP and rng.random() < 0.6:
+        return 'raise', 2*BIG_BLIND
+    return bot_station(r, sid, allowed, rng)
+
+def bot_tight(r, sid, allowed, rng):
+    if vs_random(r.by_sid[sid].cards) >= TIGHT: return bot_aggressive(r, sid, allowed, rng)
+    return ('check', 0) if allowed['check'] else ('fold', 0)
+
+POLICIES = {'random': bot_random, 'station': bot_station,
+            'aggressive': bot_aggressive, 'tight': bot_tight}
+
+def seat_bots(r, players, policy):
+    names = list(POLICIES) if policy == 'mixed' else [policy]
+    bots = {}
+    for i in range(players):
+        sid = f'bot{i}'
+        add_player(r, sid, sid)
+        bots[sid] = POLICIES[names[i % len(names)]]
+    return bots
+
+def pct(sorted_ns, q):
+    return sorted_ns[min(len(sorted_ns)-1, int(q*len(sorted_ns)))] / 1000
+
+def run(hands, players, policy, seed, trace):
+    rng = random.Random(seed)
+    decks = random.Random(seed)   # deck seeds drawn from here: the same run every time
+    r = Room()
+    bots = seat_bots(r, players, policy)
+    lat = []
+    actions = showdowns = 0
+    out = []
+
+    if trace: tracemalloc.start()
+    gc_before = [s['collections'] for s in gc.get_stats()]
+    blocks_before = sys.getallocatedblocks()
+    t0 = time.perf_counter()
+    for _ in range(hands):
+        for p in r.seats:
+            if p.chips <= 0: p.chips = STARTING_CHIPS   # rebuy
+        out.clear()
+        start_hand(r, out, deck=shuffle(decks.randbytes(SEED_BYTES)))
+        while r.state != 'waiting':
+            sid = r.seats[r.current_to_idx].sid
+            action, amount = bots[sid](r, sid, compute_allowed_actions(r, sid), rng)
+            out.clear()
+            t = time.perf_counter_ns()
+            act(r, sid, action, amount, out)
+            lat.append(time.perf_counter_ns() - t)
+            actions += 1
+        showdowns += any(ev[0] == 'showdown' for ev in out)
+    elapsed = time.perf_counter() - t0
+    blocks = sys.getallocatedblocks() - blocks_before
+    gcs = [s['collections'] - b for s,b in zip(gc.get_stats(), gc_before)]
+    peak = tracemalloc.get_traced_memory()[1] if trace else None
+    if trace: tracemalloc.stop()
+
+    lat.sort()
+    print(f'{hands} hands, {players} players, policy {policy}: {elapsed:.2f}s')
+    print(f'  hands/sec    {hands/elapsed:,.0f}')
+    print(f'  actions/sec  {actions/elapsed:,.0f}  ({actions/hands:.1f} per hand, '
+          f'{showdowns/hands:.0%} reach showdown)')
+    print(f'  act() us     p50 {pct(lat, .5):.1f}  p99 {pct(lat, .99):.1f}  max {lat[-1]/1000:.1f}')
+    print(f'  gc runs      gen0 {gcs[0]}  gen1 {gcs[1]}  gen2 {gcs[2]}')
+    print(f'  blocks       {blocks:+,} live after run (incl. {len(lat):,} latency samples)')
+    if peak is not None: print(f'  traced peak  {peak/1e6:.1f} MB')
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='headless engine benchmark')
+    ap.add_argument('--hands', type=int, default=100_000)
+    ap.add_argument('--players', type=int, default=6)
+    ap.add_argument('--policy', default='mixed', choices=['mixed'] + list(POLICIES))
+    ap.add_argument('--seed', type=int, default=1)
+    ap.add_argument('--tracemalloc', action='store_true', help='track peak traced memory (slow)')
+    a = ap.parse_args()
+    run(a.hands, a.players, a.policy, a.seed, a.tracemalloc)
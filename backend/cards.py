@@ -0,0 +1,29 @@
+# cards.py
+# Integer card encoding shared by the engine.
+#   card = rank_idx*4 + suit_idx   (0..51)
+# which is the order new_deck() has always built the deck in, so
+# CARD_STRS[c] is the familiar "T♠" display string. Rooms keep ints only;
+# strings are produced when a payload is built for the client.
+from deck import shuffle, new_seed
+
+RANKS = '23456789TJQKA'
+SUITS = ['♠','♥','♦','♣']
+RANK_TO_VAL = {r:i for i,r in enumerate(RANKS, start=2)}
+
+CARD_STRS   = [r+s for r in RANKS for s in SUITS]
+STR_TO_CARD = {s:i for i,s in enumerate(CARD_STRS)}
+
+def card_rank(c): return c >> 2        # 0..12
+def card_suit(c): return c & 3         # index into SUITS
+def card_val(c):  return (c >> 2) + 2  # 2..14, same scale as RANK_TO_VAL
+
+def to_card(s):  return STR_TO_CARD[s]
+def to_str(c):   return CARD_STRS[c]
+def to_cards(strs): return [STR_TO_CARD[s] for s in strs]
+def to_strs(cards): return [CARD_STRS[c] for c in cards]
+
+def new_deck():
+    # 52 bytes instead of 52 str objects; pop() still yields an int card.
+    # Shuffled from a fresh secrets seed (deck.py); tables.py draws decks
+    # from a DeckPool instead so it can publish and reveal the seed.
+    return shuffle(new_seed())
@@ -0,0 +1,74 @@
+# cluster.py
+# Multi-process deployment: every table is owned by exactly one worker,
+# picked by hashing the room code. Socket events reaching another worker
+# (the one holding the client's connection) are forwarded to the owner over
+# a broker channel per worker; the owner's emits fan back out to every
+# worker through Flask-SocketIO's message_queue.
+import json, zlib
+
+CHANNEL_PREFIX = 'poker:worker:'
+
+def owner_of(room, num_workers):
+    return zlib.crc32(room.encode()) % num_workers
+
+class MemoryBroker:
+    # in-process stand-in (single worker, tests): same wire format as redis
+    def __init__(self):
+        self.handlers = {}
+
+    def subscribe(self, channel, handler):
+        self.handlers[channel] = handler
+
+    def publish(self, channel, msg):
+        h = self.handlers.get(channel)
+        if h: h(json.loads(json.dumps(msg)))
+
+    def start(self, spawn):
+        pass
+
+class RedisBroker:
+    def __init__(self, url):
+        import redis  # only needed for multi-worker deployments
+        self.redis = redis.Redis.from_url(url)
+        self.pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        self.handlers = {}
+
+    def subscribe(self, channel, handler):
+        self.handlers[channel] = handler
+        self.pubsub.subscribe(channel)
+
+    def publish(self, channel, msg):
+        self.redis.publish(channel, json.dumps(msg))
+
+    def start(self, spawn):
+        spawn(self._listen)
+
+    def _listen(self):
+        for m in self.pubsub.listen():
+            h = self.handlers.get(m['channel'].decode())
+            if h: h(json.loads(m['data']))
+
+def make_broker(url):
+    if url and url.startswith(('redis://', 'rediss://')): return RedisBroker(url)
+    return MemoryBroker()
+
+class Router:
+    def __init__(self, broker, worker_id=0, num_workers=1):
+        self.broker = broker
+        self.worker_id = worker_id
+        self.num_workers = num_workers
+        self.forwarded = 0
+
+    def owns(self, room):
+        return self.num_workers == 1 or owner_of(room, self.num_workers) == self.worker_id
+
+    def forward(self, room, fn_name, args):
+        self.forwarded += 1
+        self.broker.publish(CHANNEL_PREFIX + str(owner_of(room, self.num_workers)),
+                            {'room': room, 'fn': fn_name, 'args': list(args)})
+
+    def start(self, deliver, spawn):
+        # deliver(room, fn_name, args) runs forwarded events on this worker
+        self.broker.subscribe(CHANNEL_PREFIX + str(self.worker_id),
+                              lambda m: deliver(m['room'], m['fn'], m['args']))
+        self.broker.start(spawn)
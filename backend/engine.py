@@ -0,0 +1,395 @@
+# engine.py
+# Transport-free hold'em state machine (the game rules that used to live in
+# server.py's socket handlers).
+#
+# Functions mutate a Room (see below) and append what happened to
+# `out`, a list of tuples that the caller turns into emits, timers and logs:
+#   ('message', text)                      table chat line
+#   ('turn',)                              current_to_idx has a (fresh) turn: arm its timer
+#   ('end_turn',)                          nobody is to act any more: drop the timer
+#   ('hand_started',)
+#   ('runout', [(state, cards)])           all-in: rest of the board dealt at once, per street
+#   ('showdown', [(sid, score, combo)])    river pot winners with their best five
+#   ('hand_end', winners, pot, results)    results: [(sid, final_chips, delta)]
+# Rejected requests return an error string for the caller to send back.
+# tables.py is one caller; bench.py drives the same code with bots.
+import time
+from cards import new_deck
+from evaluator import evaluate, best_hand, best_combo, unpack, rank_hands, HAND_NAMES
+from handlog import HandRecorder
+from pots import build_pots, split
+import metrics
+
+STARTING_CHIPS = 50
+SMALL_BLIND    = 1
+BIG_BLIND      = 2
+
+BETTING_STATES = ('preflop', 'flop', 'turn', 'river')
+NOT_YOUR_TURN  = 'Not your turn'
+
+EVAL_SECONDS = metrics.histogram('poker_showdown_eval_seconds', 'Ranking all contenders at showdown')
+
+# --------- hand evaluator (int cards, lookup tables in evaluator.py) ----------
+def eval5(cards5):
+    return unpack(evaluate(cards5))
+
+def best7(cards7):
+    score, combo = best_hand(cards7)
+    return unpack(score), combo
+
+def hand_name(score):
+    return HAND_NAMES[score[0]]
+
+# --------- room state ----------
+# Seats live in one list in seating order (dealer_idx / current_to_idx index
+# it); `by_sid` only maps an incoming sid to its Seat.
+#
+# During a hand the room also keeps, updated per action instead of rescanned:
+#   nxt[i]   a seat at or before the next seat after i still in the hand (a
+#            ring over in-hand seats; folded seats keep pointing forward)
+#   active   seats still in the hand
+#   pending  in-hand seats that still owe action this street (see owes)
+class Seat:
+    __slots__ = ('sid', 'name', 'chips', 'cards', 'in_hand', 'contribution', 'has_acted',
+                 'committed', 'chips_before_hand')
+
+    def __init__(self, sid, name, chips):
+        self.sid = sid
+        self.name = name
+        self.chips = chips
+        self.cards = []
+        self.in_hand = True
+        self.contribution = 0           # this street
+        self.has_acted = False
+        self.committed = 0              # this hand, all streets: the pot ledger (pots.py)
+        self.chips_before_hand = None   # set while a hand is running
+
+class Room:
+    __slots__ = ('seats', 'by_sid', 'deck', 'community', 'pot', 'dealer_idx',
+                 'current_to_idx', 'current_bet', 'state', 'recorder', 'nxt', 'active', 'pending',
+                 'small_blind', 'big_blind')
+
+    def __init__(self):
+        self.seats = []
+        self.by_sid = {}
+        self.deck = bytearray()   # int cards 0..51, see cards.py
+        self.community = []
+        self.pot = 0
+        self.dealer_idx = 0
+        self.current_to_idx = 0
+        self.current_bet = 0
+        self.state = 'waiting'
+        self.recorder = None      # HandRecorder for the hand in progress (handlog.py)
+        self.nxt = []
+        self.active = 0
+        self.pending = 0
+        self.small_blind = SMALL_BLIND   # tournaments raise them between hands
+        self.big_blind = BIG_BLIND
+
+def add_player(r, sid, name, chips=STARTING_CHIPS):
+    seat = Seat(sid, name, chips)
+    seat.in_hand = r.state == 'waiting'   # sitting down mid-hand: dealt in from the next one
+    old = r.by_sid.get(sid)
+    if old: r.seats[r.seats.index(old)] = seat   # rejoin keeps the seat
+    else: r.seats.append(seat)
+    r.by_sid[sid] = seat
+    relink(r)
+
+def remove_player(r, sid):
+    seat = r.by_sid.pop(sid, None)
+    if seat:
+        i = r.seats.index(seat)
+        del r.seats[i]
+        # keep the button and the turn on the same seats; a removed button
+        # passes back one seat so the next hand still moves it forward
+        if r.dealer_idx >= i: r.dealer_idx -= 1
+        if r.current_to_idx > i: r.current_to_idx -= 1
+        nb = len(r.seats)
+        r.dealer_idx = r.dealer_idx % nb if nb else 0
+        r.current_to_idx = r.current_to_idx % nb if nb else 0
+        relink(r)
+
+def rebind_player(r, sid, new_sid):
+    # the same seat, chips and cards under a new connection (a player reconnecting)
+    seat = r.by_sid.pop(sid)
+    seat.sid = new_sid
+    r.by_sid[new_sid] = seat
+    if r.recorder: r.recorder.rebind(sid, new_sid)
+
+def active_players_in_hand(r):
+    return [s for s in r.seats if s.in_hand]
+
+def compute_allowed_actions(r, sid):
+    res = {'check': False, 'call': False, 'raise': False, 'fold': False}
+    if r.state in ('waiting','showdown'): return res
+    cur = r.current_to_idx
+    if cur<0 or cur>=len(r.seats): return res
+    p = r.seats[cur]
+    if p.sid != sid or not p.in_hand: return res
+
+    need  = max(0, r.current_bet - p.contribution)
+    res['fold'] = True
+    if need==0:
+        res['check'] = True
+        res['raise'] = p.chips>0
+    else:
+        res['call']  = p.chips>0
+        res['raise'] = p.chips>need
+    return res
+
+def owes(r, p):
+    return p.in_hand and (not p.has_acted or (p.contribution < r.current_bet and p.chips>0))
+
+def relink(r):
+    # rebuild ring and counters from scratch: new hand, seats joining or leaving
+    nb = len(r.seats)
+    r.nxt = [0]*nb
+    following = None
+    for i in range(2*nb-1, -1, -1):   # two passes to wrap around
+        j = i % nb
+        if following is not None: r.nxt[j] = following
+        if r.seats[j].in_hand: following = j
+    r.active = sum(1 for p in r.seats if p.in_hand)
+    r.pending = sum(1 for p in r.seats if owes(r, p))
+
+def betting_round_complete(r):
+    return r.active <= 1 or not r.pending
+
+def next_in_hand(r, idx):
+    # first seat after idx still in the hand (idx itself when it is the last one)
+    start, nb = idx, len(r.seats)
+    for _ in range(nb):
+        idx = r.nxt[idx]
+        if r.seats[idx].in_hand:
+            r.nxt[start] = idx   # shortcut past the folded seats
+            return idx
+    return r.current_to_idx
+
+def next_to_act(r, idx):
+    # first seat after idx that can still bet: all-in seats stay in the hand
+    # but never get a turn
+    for _ in range(len(r.seats)):
+        idx = next_in_hand(r, idx)
+        if r.seats[idx].chips > 0: return idx
+    return idx
+
+# --------- hand flow ----------
+def start_hand(r, out, room=None, record=False, deck=None):
+    # room: code written to the hand log when record=True
+    if sum(1 for p in r.seats if p.chips > 0) < 2: return 'Need at least 2 players'
+
+    # rotate dealer (keep existing order) to the next seat with chips
+    nb = len(r.seats)
+    r.dealer_idx = (r.dealer_idx + 1) % nb
+    while not r.seats[r.dealer_idx].chips:
+        r.dealer_idx = (r.dealer_idx + 1) % nb
+
+    # reset hand; a seat without chips sits the hand out, so it is off the
+    # ring and never owes an action
+    r.deck = deck if deck is not None else new_deck()
+    r.community = []
+    r.pot = 0
+    r.current_bet = 0
+    r.state = 'preflop'
+    for p in r.seats:
+        p.in_hand = p.chips > 0
+        p.cards = [r.deck.pop(), r.deck.pop()] if p.in_hand else []
+        p.contribution = 0
+        p.committed = 0
+        p.has_acted = False
+        p.chips_before_hand = p.chips
+    relink(r)
+
+    # blinds: the next two seats in the hand (heads-up the dealer posts the big one)
+    sb_idx = r.nxt[r.dealer_idx]
+    bb_idx = r.nxt[sb_idx]
+    sb, bb = r.seats[sb_idx], r.seats[bb_idx]
+    sb_pay = min(r.small_blind, sb.chips)
+    sb.chips -= sb_pay; sb.contribution = sb.committed = sb_pay; sb.has_acted = True
+    bb_pay = min(r.big_blind, bb.chips)
+    bb.chips -= bb_pay; bb.contribution = bb.committed = bb_pay; bb.has_acted = True
+    r.pot += sb_pay + bb_pay
+    r.current_bet = max(sb_pay, bb_pay)   # a short big blind leaves the small one the bet
+    r.pending = sum(1 for p in r.seats if owes(r, p))
+    r.recorder = None
+    if record:
+        rec = r.recorder = HandRecorder(room or '', time.time(), r.dealer_idx,
+            [(p.sid, p.name, p.chips_before_hand, p.cards) for p in r.seats])
+        rec.blind(sb.sid, sb_pay)
+        rec.blind(bb.sid, bb_pay)
+
+    # first to act is after big blind
+    r.current_to_idx = next_to_act(r, bb_idx)
+    out.append(('hand_started',))
+    if not r.pending:   # the blinds put everyone who could call all-in
+        runout(r, out)
+        return
+    out.append(('turn',))
+
+def act(r, sid, action, amount, out):
+    if not r.seats: return None
+    p = r.seats[r.current_to_idx]
+    if r.state not in BETTING_STATES or p.sid != sid:
+        return NOT_YOUR_TURN
+    pay = 0
+    owed = owes(r, p)
+
+    if action in ('fold', 'timeout'):
+        if p.in_hand: r.active -= 1
+        p.in_hand = False
+        p.has_acted = True
+        out.append(('message', f"{p.name} auto-folded (timeout)" if action == 'timeout'
+                               else f"{p.name} folded"))
+
+    elif action == 'check':
+        if p.contribution >= r.current_bet:
+            p.has_acted = True
+            out.append(('message', f"{p.name} checked"))
+        else:
+            out.append(('turn',))
+            return 'Cannot check, must call/raise'
+
+    elif action == 'call':
+        pay = max(0, min(r.current_bet - p.contribution, p.chips))
+        p.chips -= pay
+        p.contribution += pay
+        p.committed += pay
+        p.has_acted = True
+        r.pot += pay
+        out.append(('message', f"{p.name} called {pay}"))
+
+    elif action == 'raise':
+        if amount <= 0:
+            out.append(('turn',))
+            return 'Raise amount must be > 0'
+        pay = min(r.current_bet - p.contribution + amount, p.chips)
+        p.chips -= pay
+        p.contribution += pay
+        p.committed += pay
+        r.pot += pay
+        if p.contribution > r.current_bet:
+            r.current_bet = p.contribution
+            # others must act again
+            others = 0
+            for op in r.seats:
+                if op is not p and op.in_hand:
+                    if op.chips>0: op.has_acted = False
+                    others += owes(r, op)
+            r.pending = others + owed   # p itself is settled below
+        p.has_acted = True
+        out.append(('message', f"{p.name} raised, bet is {r.current_bet}"))
+
+    else:
+        out.append(('turn',))
+        return 'Unknown action'
+
+    r.pending += owes(r, p) - owed
+    if r.recorder: r.recorder.action(sid, action, pay)
+
+    # early win by folds
+    if r.active == 1:
+        award(r, {next_in_hand(r, r.current_to_idx): r.pot}, out)
+        return None
+
+    # end of round?
+    if betting_round_complete(r):
+        next_street(r, out)
+        return None
+
+    # otherwise go to next active player (same street)
+    r.current_to_idx = next_to_act(r, r.current_to_idx)
+    out.append(('turn',))
+    return None
+
+def fold_out(r, sid, out):
+    # a seat leaving mid-hand folds out of turn; it stays seated until the
+    # hand is over, since its chips are in the pot (the caller removes it then)
+    p = r.by_sid.get(sid)
+    if r.state not in BETTING_STATES or p is None or not p.in_hand: return
+    if r.seats[r.current_to_idx] is p:
+        act(r, sid, 'fold', 0, out)
+        return
+    r.pending -= owes(r, p)
+    p.in_hand = False
+    p.has_acted = True
+    r.active -= 1
+    out.append(('message', f"{p.name} folded"))
+    if r.recorder: r.recorder.action(sid, 'fold', 0)
+    if r.active == 1:
+        award(r, {next_in_hand(r, r.current_to_idx): r.pot}, out)
+    elif betting_round_complete(r):
+        next_street(r, out)
+
+def award(r, won, out):
+    # won: seat index -> chips (empty when nothing was bet)
+    pot = r.pot
+    for i, amount in won.items():
+        r.seats[i].chips += amount
+    r.pot = 0
+    winners = [r.seats[i].sid for i in sorted(won)]
+    results = [(p.sid, p.chips, p.chips - (p.chips if p.chips_before_hand is None else p.chips_before_hand))
+               for p in r.seats]
+    if r.recorder:
+        r.recorder.showdown(winners, {p.sid: p.chips for p in r.seats})
+    r.state = 'waiting'
+    for p in r.seats:
+        p.chips_before_hand = None
+    out.append(('end_turn',))
+    out.append(('hand_end', winners, pot, results))
+
+def showdown(r, out):
+    # rank every hand once against the shared board, then split the side
+    # pots layer by layer
+    t = time.perf_counter()
+    ranked = rank_hands(r.community, {i: p.cards for i, p in enumerate(r.seats) if p.in_hand})
+    EVAL_SECONDS.observe(time.perf_counter() - t)
+    if not ranked: return
+    nb = len(r.seats)
+    pots = build_pots([p.committed for p in r.seats], [p.in_hand for p in r.seats])
+    won = split(pots, ranked, (r.dealer_idx + 1) % nb, nb)
+    score = {i: s for i, s, _ in ranked}
+    shown = []
+    for i in sorted(won):
+        cards = r.seats[i].cards + r.community
+        shown.append((r.seats[i].sid, unpack(score[i]), best_combo(cards, score[i])))
+    out.append(('showdown', shown))
+    award(r, won, out)
+
+NEXT_STREET = {'preflop': ('flop', 3), 'flop': ('turn', 1), 'turn': ('river', 1)}
+
+def deal_street(r):
+    r.state, n = NEXT_STREET[r.state]
+    r.community += [r.deck.pop() for _ in range(n)]
+    if r.recorder: r.recorder.street(r.state, r.community)
+
+def next_street(r, out):
+    if r.state=='river':
+        showdown(r, out)
+        return
+    shown = len(r.community)
+    deal_street(r)
+
+    # reset contributions/acted for new street and set first to act after dealer
+    r.current_bet = 0
+    r.pending = 0
+    for p in r.seats:
+        p.contribution = 0   # all-in seats too, or their old bet blocks 'check'
+        p.has_acted = not (p.in_hand and p.chips>0)
+        r.pending += not p.has_acted
+
+    if r.pending <= 1:   # at most one seat with chips: nobody left to bet against
+        runout(r, out, [(r.state, r.community[shown:])])
+        return
+    r.current_to_idx = next_to_act(r, r.dealer_idx)
+    out.append(('turn',))
+
+def runout(r, out, streets=()):
+    # everyone left is all-in: deal the rest of the board in one go, no turns.
+    # streets: what this event already dealt, so the runout event has it all
+    streets = list(streets)
+    while r.state != 'river':
+        shown = len(r.community)
+        deal_street(r)
+        streets.append((r.state, r.community[shown:]))
+    out.append(('runout', streets))
+    showdown(r, out)
@@ -0,0 +1,132 @@
+# equity.py
+# Win probability for the hands still in a room, vectorised with NumPy.
+# Uses the same lookup tables as evaluator.py, mirrored into arrays so a
+# whole batch of runouts is scored with a handful of array ops:
+#   non-flush: prime product -> searchsorted into the sorted NONFLUSH keys
+#   flush:     per-suit rank mask -> FLUSH table
+# Few unseen cards left (flop/turn/river) -> every runout is enumerated;
+# otherwise random runouts are sampled until the iteration or time budget.
+#
+# cached_equity() puts an LRU in front, keyed by canonical(): the spot with
+# its suits relabeled, so AhKh vs QsQc on a given board and every suit
+# swap of it share one simulation. Preflop classes against each other or
+# a random hand come precomputed from preflop.py.
+import threading, time
+from collections import OrderedDict
+from itertools import combinations, permutations
+from math import comb
+import numpy as np
+from evaluator import NONFLUSH, FLUSH, PRIMES
+
+EQUITY_TIME_BUDGET = 0.5        # seconds per request
+EQUITY_MAX_ITERS   = 2_000_000
+EXACT_LIMIT        = 50_000     # enumerate when runouts <= this
+BATCH              = 20_000
+EQUITY_CACHE_SIZE  = 4096       # spots
+
+_KEYS  = np.array(sorted(NONFLUSH), dtype=np.int64)
+_VALS  = np.array([NONFLUSH[k] for k in _KEYS.tolist()], dtype=np.int64)
+_FLUSH = np.array(FLUSH, dtype=np.int64)
+_PRIME = np.array([PRIMES[c >> 2] for c in range(52)], dtype=np.int64)
+_RBIT  = np.array([1 << (c >> 2) for c in range(52)], dtype=np.int64)
+_SUIT  = np.array([c & 3 for c in range(52)], dtype=np.int64)
+
+def evaluate_batch(cards):
+    # (N, k) int cards, k in 5..7 -> (N,) packed scores (same as evaluator.evaluate)
+    best = _VALS[np.searchsorted(_KEYS, _PRIME[cards].prod(axis=1))]
+    bits, suits = _RBIT[cards], _SUIT[cards]
+    for s in range(4):
+        np.maximum(best, _FLUSH[np.where(suits == s, bits, 0).sum(axis=1)], out=best)
+    return best
+
+def _sample(rng, n, need, size):
+    # `size` rows of `need` distinct indices < n (rejection on duplicates)
+    idx = rng.integers(0, n, (size, need))
+    if need > 1:
+        s = np.sort(idx, axis=1)
+        idx = idx[(np.diff(s, axis=1) != 0).all(axis=1)]
+    return idx
+
+def equity(hands, board, dead=(), time_budget=EQUITY_TIME_BUDGET,
+           max_iters=EQUITY_MAX_ITERS, rng=None):
+    # hands: [[c1,c2], ...] per contender; board: 0..5 cards; dead: other cards out of the deck
+    hands = np.asarray(hands, dtype=np.int64).reshape(-1, 2)
+    board = np.asarray(board, dtype=np.int64)
+    seen  = set(hands.ravel().tolist()) | set(board.tolist()) | set(dead)
+    stub  = np.array([c for c in range(52) if c not in seen], dtype=np.int64)
+    need  = 5 - len(board)
+    nplayers = len(hands)
+    win   = np.zeros(nplayers); tie = np.zeros(nplayers); share = np.zeros(nplayers)
+
+    def run(runouts):
+        b = len(runouts)
+        full = np.hstack([np.broadcast_to(board, (b, len(board))), runouts])
+        scores = np.stack([evaluate_batch(np.hstack([np.broadcast_to(h, (b, 2)), full]))
+                           for h in hands], axis=1)
+        top = scores == scores.max(axis=1, keepdims=True)
+        nwin = top.sum(axis=1, keepdims=True)
+        win[:]   += (top & (nwin == 1)).sum(axis=0)
+        tie[:]   += (top & (nwin > 1)).sum(axis=0)
+        share[:] += (top / nwin).sum(axis=0)
+        return b
+
+    total = comb(len(stub), need)
+    exact = total <= EXACT_LIMIT
+    iters = 0
+    if exact:
+        allruns = stub[np.array(list(combinations(range(len(stub)), need)),
+                                dtype=np.int64).reshape(total, need)]
+        for i in range(0, total, BATCH):
+            iters += run(allruns[i:i+BATCH])
+    else:
+        rng = rng or np.random.default_rng()
+        stop = time.perf_counter() + time_budget
+        while iters < max_iters and time.perf_counter() < stop:
+            iters += run(stub[_sample(rng, len(stub), need, min(BATCH, max_iters - iters))])
+    n = max(iters, 1)
+    return {'win': (win/n).tolist(), 'tie': (tie/n).tolist(), 'equity': (share/n).tolist(),
+            'iterations': iters, 'exact': exact}
+
+# --------- cache ----------
+# all 24 suit relabelings, each as a card -> card map
+_PERMS = [[(c & ~3) | p[c & 3] for c in range(52)] for p in permutations(range(4))]
+
+def canonical(hands, board, dead=()):
+    # one key for a spot and all its suit relabelings: the smallest of them,
+    # with hands kept in order (results are per hand) and each hand, the
+    # board and the dead cards sorted
+    return min((tuple(tuple(sorted(m[c] for c in h)) for h in hands),
+                tuple(sorted(m[c] for c in board)), tuple(sorted(m[c] for c in dead)))
+               for m in _PERMS)
+
+class LRU:
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()   # rooms and equity workers share it
+
+    def get(self, key):
+        with self.lock:
+            res = self.entries.get(key)
+            if res is not None: self.entries.move_to_end(key)
+            return res
+
+    def put(self, key, res):
+        with self.lock:
+            self.entries[key] = res
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.size: self.entries.popitem(last=False)
+
+cache = LRU(EQUITY_CACHE_SIZE)
+
+def lookup(hands, board, dead=()):
+    # the cached result or None, never simulates
+    return cache.get(canonical(hands, board, dead))
+
+def cached_equity(hands, board, dead=()):
+    key = canonical(hands, board, dead)
+    res = cache.get(key)
+    if res is None:
+        res = equity(hands, board, dead)
+        cache.put(key, res)
+    return res
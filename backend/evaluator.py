@@ -0,0 +1,173 @@
+# evaluator.py
+# Table-driven hand evaluator shared by server.py and pockerLogic.py.
+#
+# A score is the same (category, tiebreak) pair eval5 has always produced,
+# packed into one int so hands compare with a single integer comparison:
+#     category<<20 | tiebreak values as 4-bit nibbles, left aligned
+# Tiebreak length is fixed per category, so packed order == tuple order.
+#
+# Lookups (built once at import):
+#   NONFLUSH[prime product of ranks] -> best score for that rank multiset
+#   FLUSH[13-bit rank mask of a suit] -> straight-flush / flush score (0 if <5)
+# so 5, 6 or 7 integer cards are scored in one pass with no combinations.
+#
+# At showdown everyone shares the board: prepare_board() folds it into a
+# partial product / suit masks once, and rank_hands() scores each contender
+# by adding just its two hole cards.
+from itertools import combinations_with_replacement
+from cards import card_rank, card_suit
+
+PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+TB_LEN = (5, 4, 3, 3, 1, 5, 2, 2, 1)   # tiebreak length by category
+HAND_NAMES = ("High Card", "Pair", "Two Pair", "Three of a Kind", "Straight",
+              "Flush", "Full House", "Four of a Kind", "Straight Flush")
+
+# (top value, rank mask) from A-high down to the wheel
+STRAIGHTS = [(top, 0b11111 << (top - 6)) for top in range(14, 5, -1)]
+STRAIGHTS.append((5, (1 << 12) | 0b1111))
+
+def pack(cat, tb):
+    v = cat
+    for i in range(5):
+        v = (v << 4) | (tb[i] if i < len(tb) else 0)
+    return v
+
+def unpack(score):
+    cat = score >> 20
+    return (cat, tuple((score >> (16 - 4*i)) & 0xF for i in range(TB_LEN[cat])))
+
+def category(score): return score >> 20
+
+def _straight_top(mask):
+    for top, m in STRAIGHTS:
+        if mask & m == m: return top
+    return None
+
+# --------- table construction ----------
+def _score_counts(cnt):
+    # cnt[rank_idx] -> copies; best non-flush score for 5..7 cards
+    present = [r+2 for r in range(12, -1, -1) if cnt[r]]
+    quads = [v for v in present if cnt[v-2] == 4]
+    trips = [v for v in present if cnt[v-2] == 3]
+    pairs = [v for v in present if cnt[v-2] == 2]
+    if quads:
+        q = quads[0]
+        return 7, (q, max(v for v in present if v != q))
+    if trips and (len(trips) > 1 or pairs):
+        t = trips[0]
+        return 6, (t, max(trips[1:] + pairs))
+    mask = 0
+    for v in present: mask |= 1 << (v-2)
+    top = _straight_top(mask)
+    if top: return 4, (top,)
+    if trips:
+        t = trips[0]
+        return 3, (t,) + tuple(v for v in present if v != t)[:2]
+    if len(pairs) >= 2:
+        p1, p2 = pairs[:2]
+        return 2, (p1, p2, max(v for v in present if v not in (p1, p2)))
+    if pairs:
+        p = pairs[0]
+        return 1, (p,) + tuple(v for v in present if v != p)[:3]
+    return 0, tuple(present[:5])
+
+def _build_tables():
+    nonflush = {}
+    for n in (5, 6, 7):
+        for ranks in combinations_with_replacement(range(13), n):
+            cnt = [0]*13
+            prod = 1
+            for r in ranks:
+                cnt[r] += 1; prod *= PRIMES[r]
+            if max(cnt) > 4: continue
+            nonflush[prod] = pack(*_score_counts(cnt))
+    flush = [0]*8192
+    for mask in range(8192):
+        if mask.bit_count() < 5: continue
+        top = _straight_top(mask)
+        if top:
+            flush[mask] = pack(8, (top,))
+        else:
+            vals = [r+2 for r in range(12, -1, -1) if mask >> r & 1]
+            flush[mask] = pack(5, vals[:5])
+    return nonflush, flush
+
+NONFLUSH, FLUSH = _build_tables()
+
+# --------- evaluation ----------
+def evaluate(cards):
+    # 5..7 integer cards -> packed score
+    prod = 1; s0 = s1 = s2 = s3 = 0
+    for c in cards:
+        r = c >> 2
+        prod *= PRIMES[r]
+        s = c & 3
+        if   s == 0: s0 |= 1 << r
+        elif s == 1: s1 |= 1 << r
+        elif s == 2: s2 |= 1 << r
+        else:        s3 |= 1 << r
+    best = NONFLUSH[prod]
+    f = max(FLUSH[s0], FLUSH[s1], FLUSH[s2], FLUSH[s3])
+    return f if f > best else best
+
+def prepare_board(board):
+    # 3..5 shared cards -> (rank prime product, suit masks, best board-only flush)
+    prod = 1
+    suits = [0]*4
+    for c in board:
+        prod *= PRIMES[c >> 2]
+        suits[c & 3] |= 1 << (c >> 2)
+    return prod, suits, max(FLUSH[m] for m in suits)
+
+def evaluate_hole(pre, hole):
+    # two hole cards against prepare_board(board) -> same score as evaluate(hole + board)
+    prod, suits, f = pre
+    a, b = hole
+    best = NONFLUSH[prod * PRIMES[a >> 2] * PRIMES[b >> 2]]
+    sa, sb = a & 3, b & 3
+    if sa == sb:
+        f = max(f, FLUSH[suits[sa] | 1 << (a >> 2) | 1 << (b >> 2)])
+    else:
+        f = max(f, FLUSH[suits[sa] | 1 << (a >> 2)], FLUSH[suits[sb] | 1 << (b >> 2)])
+    return f if f > best else best
+
+def rank_hands(board, hands):
+    # hands: {key: two hole cards} (or a list, keyed by index)
+    # -> [(key, score, hand name)] best first; equal scores keep input order,
+    #    so the winners are the leading entries scoring ranked[0][1]
+    pre = prepare_board(board)
+    items = hands.items() if isinstance(hands, dict) else enumerate(hands)
+    scored = [(k, evaluate_hole(pre, h)) for k, h in items]
+    scored.sort(key=lambda e: e[1], reverse=True)
+    return [(k, s, HAND_NAMES[s >> 20]) for k, s in scored]
+
+def best_combo(cards, score):
+    # The 5 cards (in input order) making `score`; when several subsets tie
+    # this is the first one itertools.combinations would have produced.
+    cat, tb = unpack(score)
+    need = [0]*13
+    if cat in (8, 4):
+        top = tb[0]
+        for v in ((5, 4, 3, 2, 14) if top == 5 else range(top, top-5, -1)):
+            need[v-2] = 1
+    elif cat in (5, 0):
+        for v in tb: need[v-2] = 1
+    else:
+        copies = {7: (4, 1), 6: (3, 2), 3: (3, 1, 1), 2: (2, 2, 1), 1: (2, 1, 1, 1)}[cat]
+        for v, k in zip(tb, copies): need[v-2] = k
+    flush_suit = None
+    if cat in (8, 5):
+        sc = [0]*4
+        for c in cards: sc[card_suit(c)] += 1
+        flush_suit = sc.index(max(sc))
+    combo = []
+    for c in cards:
+        r = card_rank(c)
+        if need[r] and (flush_suit is None or card_suit(c) == flush_suit):
+            need[r] -= 1
+            combo.append(c)
+    return combo
+
+def best_hand(cards):
+    score = evaluate(cards)
+    return score, best_combo(cards, score)
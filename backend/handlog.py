@@ -0,0 +1,182 @@
+# handlog.py
+# Compact append-only binary action log, one frame per finished hand.
+#
+#   file   := frame*
+#   frame  := u32 length, record*          (one hand; written in one append)
+#   record := u8 type, u16 length, payload (little endian throughout)
+#
+# Records of a hand are buffered on the room by a HandRecorder and appended
+# as a single frame at showdown, so hands from different tables never
+# interleave. read_hands() streams frames back one at a time and replay()
+# plays a hand through engine.py again, ending in the room state it ended in.
+import struct, threading
+from cards import to_strs
+
+START, BLIND, ACTION, STREET, SHOWDOWN = 1, 2, 3, 4, 5
+ACTIONS = ('fold', 'check', 'call', 'raise', 'timeout')   # 'timeout' = auto-fold
+STATES  = ('waiting', 'preflop', 'flop', 'turn', 'river', 'showdown')
+NO_CARD = 255
+
+_frame = struct.Struct('<I')
+_rec   = struct.Struct('<BH')
+_start = struct.Struct('<dBB')     # started_at, dealer_idx, seat count
+_seat  = struct.Struct('<IBB')     # chips, hole card 1, hole card 2
+_bet   = struct.Struct('<BI')      # seat, amount
+_act   = struct.Struct('<BBI')     # seat, action, amount paid
+
+def _str(s):
+    b = s.encode()[:255]
+    return bytes((len(b),)) + b
+
+def _read_str(data, off):
+    n = data[off]
+    return data[off+1:off+1+n].decode(), off+1+n
+
+class HandRecorder:
+    __slots__ = ('buf', 'seats')
+
+    def __init__(self, room, started_at, dealer_idx, seats):
+        # seats: [(sid, name, chips, cards)] in turn order, chips before blinds
+        self.buf = bytearray()
+        self.seats = {sid: i for i,(sid,_,_,_) in enumerate(seats)}
+        p = bytearray(_str(room))
+        p += _start.pack(started_at, dealer_idx, len(seats))
+        for sid, name, chips, cards in seats:
+            c = list(cards) + [NO_CARD]*(2 - len(cards))
+            p += _str(sid) + _str(name) + _seat.pack(chips, c[0], c[1])
+        self._add(START, p)
+
+    @classmethod
+    def resume(cls, buf, seats):
+        # a hand in progress restored from a snapshot (tables.py)
+        rec = cls.__new__(cls)
+        rec.buf = bytearray(buf)
+        rec.seats = dict(seats)
+        return rec
+
+    def rebind(self, sid, new_sid):
+        # the seat's player reconnected under a new sid; the log keeps the old one
+        self.seats = {new_sid if s == sid else s: i for s, i in self.seats.items()}
+
+    def _add(self, kind, payload):
+        self.buf += _rec.pack(kind, len(payload))
+        self.buf += payload
+
+    def blind(self, sid, amount):
+        if sid in self.seats: self._add(BLIND, _bet.pack(self.seats[sid], amount))
+
+    def action(self, sid, action, amount=0):
+        if sid in self.seats: self._add(ACTION, _act.pack(self.seats[sid], ACTIONS.index(action), amount))
+
+    def street(self, state, board):
+        self._add(STREET, bytes((STATES.index(state),)) + bytes(board))
+
+    def showdown(self, winners, chips):
+        # winners: sids; chips: sid -> final chips
+        seats = [self.seats[s] for s in winners if s in self.seats]
+        p = bytes((len(seats),)) + bytes(seats)
+        p += b''.join(struct.pack('<I', chips.get(sid, 0)) for sid in self.seats)
+        self._add(SHOWDOWN, p)
+
+class HandLog:
+    def __init__(self, path):
+        self.path = path
+        self.f = open(path, 'ab')
+        self.lock = threading.Lock()
+        self.hands = 0
+
+    def append(self, rec):
+        with self.lock:
+            self.f.write(_frame.pack(len(rec.buf)) + rec.buf)
+            self.f.flush()
+            self.hands += 1
+
+    def close(self):
+        with self.lock:
+            self.f.close()
+
+# --------- reading ----------
+def decode(data):
+    # one frame -> records as tuples
+    off = 0
+    while off < len(data):
+        kind, n = _rec.unpack_from(data, off); off += _rec.size
+        p = data[off:off+n]; off += n
+        if kind == START:
+            room, o = _read_str(p, 0)
+            started_at, dealer_idx, nseats = _start.unpack_from(p, o); o += _start.size
+            seats = []
+            for _ in range(nseats):
+                sid, o = _read_str(p, o)
+                name, o = _read_str(p, o)
+                chips, c1, c2 = _seat.unpack_from(p, o); o += _seat.size
+                seats.append((sid, name, chips, [c for c in (c1, c2) if c != NO_CARD]))
+            yield ('start', room, started_at, dealer_idx, seats)
+        elif kind == BLIND:
+            yield ('blind',) + _bet.unpack(p)
+        elif kind == ACTION:
+            seat, a, amount = _act.unpack(p)
+            yield ('action', seat, ACTIONS[a], amount)
+        elif kind == STREET:
+            yield ('street', STATES[p[0]], list(p[1:]))
+        elif kind == SHOWDOWN:
+            k = p[0]
+            chips = [v for (v,) in struct.iter_unpack('<I', p[1+k:])]
+            yield ('showdown', list(p[1:1+k]), chips)
+
+def read_hands(path):
+    # generator over hands (lists of records); never loads the whole file
+    with open(path, 'rb') as f:
+        while True:
+            head = f.read(_frame.size)
+            if len(head) < _frame.size: return
+            (n,) = _frame.unpack(head)
+            data = f.read(n)
+            if len(data) < n: return   # torn tail from a crash
+            yield list(decode(data))
+
+def replay(hand):
+    # play one hand's records through the engine again: the seats sit down
+    # with their recorded stacks, the deck is stacked so start_hand deals
+    # the recorded cards, and every action goes through act(). -> (the
+    # engine.Room the hand ends in, info: code, started_at, actions as
+    # (name, action, paid), winners' sids). Raises ValueError when the
+    # records do not replay to the recorded result.
+    import engine   # engine records through HandRecorder: imported here, not at the top
+    _, room, started_at, dealer_idx, seats = hand[0]
+    r = engine.Room()
+    for sid, name, chips, _ in seats: engine.add_player(r, sid, name, chips)
+    blinds = [amount for kind, _, amount in (rec for rec in hand if rec[0] == 'blind')]
+    if len(blinds) == 2: r.small_blind, r.big_blind = blinds
+    board = next((rec[2] for rec in reversed(hand) if rec[0] == 'street'), [])
+    dealt = [c for _, _, chips, cards in seats if chips > 0 for c in cards] + board
+    r.dealer_idx = (dealer_idx - 1) % len(seats)   # start_hand moves the button on
+    out = []
+    engine.start_hand(r, out, deck=bytearray(reversed(dealt)))
+    info = {'code': room, 'started_at': started_at, 'actions': [], 'winners': []}
+    for rec in hand:
+        if rec[0] == 'action':
+            _, seat, action, paid = rec
+            p = r.seats[seat]
+            if action == 'fold':   # in turn or not (a player leaving)
+                engine.fold_out(r, p.sid, out); err = None
+            else:
+                need = max(0, r.current_bet - p.contribution)
+                err = engine.act(r, p.sid, action, max(1, paid - need), out)
+            if err: raise ValueError(f'{p.name} {action} {paid}: {err}')
+            info['actions'].append((p.name, action, paid))
+        elif rec[0] == 'showdown':
+            _, winners, chips = rec
+            if [p.chips for p in r.seats] != chips:
+                raise ValueError('replayed stacks differ from the recorded ones')
+            info['winners'] = [seats[i][0] for i in winners]
+    return r, info
+
+def describe(hand):
+    # human readable lines, for debugging a log
+    r, info = replay(hand)
+    names = {p.sid: p.name for p in r.seats}
+    lines = [f"room {info['code']} board {' '.join(to_strs(r.community))}"]
+    lines += [f"  {name} {action} {amount}" for name, action, amount in info['actions']]
+    lines.append('  winners: ' + ', '.join(names[s] for s in info['winners']))
+    return lines
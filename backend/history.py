@@ -0,0 +1,93 @@
+# history.py
+# Write-behind persistence of finished hands into models.Room / models.Hand.
+#
+# The game thread only does a non-blocking queue put; one writer thread
+# drains the queue and inserts in batches of at most HISTORY_BATCH hands,
+# at most HISTORY_FLUSH_SECS after the oldest queued hand. close() (also
+# registered with atexit) drains whatever is left before the process exits.
+import atexit, queue, threading, time, traceback
+from db import SessionLocal, init_db
+
+HISTORY_BATCH      = 200
+HISTORY_FLUSH_SECS = 1.0
+HISTORY_MAX_QUEUE  = 10_000   # hands dropped (and counted) beyond this
+
+_STOP = object()
+
+class HandWriter:
+    def __init__(self, batch=HISTORY_BATCH, interval=HISTORY_FLUSH_SECS,
+                 maxsize=HISTORY_MAX_QUEUE, session_factory=SessionLocal):
+        self.q = queue.Queue(maxsize)
+        self.batch, self.interval = batch, interval
+        self.session_factory = session_factory
+        self.room_ids = {}     # room code -> rooms.id
+        self.thread = None
+        self.written = 0
+        self.dropped = 0
+
+    def start(self):
+        if self.thread: return
+        self.thread = threading.Thread(target=self._run, name='hand-writer', daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def record(self, room, started_at, ended_at, summary):
+        try:
+            self.q.put_nowait((room, started_at, ended_at, summary))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=10):
+        if not self.thread or not self.thread.is_alive(): return
+        self.q.put(_STOP)
+        self.thread.join(timeout)
+
+    def _run(self):
+        try:
+            init_db()
+        except Exception:
+            traceback.print_exc()
+        stop = False
+        while not stop:
+            item = self.q.get()
+            if item is _STOP: break
+            batch = [item]
+            flush_at = time.monotonic() + self.interval
+            while len(batch) < self.batch:
+                wait = flush_at - time.monotonic()
+                if wait <= 0: break
+                try:
+                    item = self.q.get(timeout=wait)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True; break
+                batch.append(item)
+            self._write(batch)
+        # drain anything queued after the stop marker
+        rest = []
+        while True:
+            try: item = self.q.get_nowait()
+            except queue.Empty: break
+            if item is not _STOP: rest.append(item)
+        for i in range(0, len(rest), self.batch):
+            self._write(rest[i:i+self.batch])
+
+    def _write(self, batch):
+        from models import Room, Hand
+        try:
+            with self.session_factory() as s:
+                for code in {b[0] for b in batch} - self.room_ids.keys():
+                    row = s.query(Room).filter_by(code=code).one_or_none()
+                    if row is None:
+                        row = Room(code=code); s.add(row); s.flush()
+                    self.room_ids[code] = row.id
+                s.add_all([Hand(room_id=self.room_ids[code], started_at=started,
+                                ended_at=ended, summary=summary)
+                           for code, started, ended, summary in batch])
+                s.commit()
+            self.written += len(batch)
+        except Exception:
+            self.room_ids.clear()
+            self.dropped += len(batch)
+            traceback.print_exc()
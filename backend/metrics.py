@@ -0,0 +1,91 @@
+# metrics.py
+# Counters and latency histograms in the Prometheus text format, served as
+# GET /metrics by both transports. No client library: recording is a dict
+# lookup and a couple of adds, with no lock (under the GIL a rare increment
+# can be lost when two threads hit the same series; that is the price of
+# keeping locks off the hot path). Gauges are callbacks read at scrape time.
+import bisect
+
+# seconds: 50us .. 2.5s
+BUCKETS = (.00005, .0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5)
+
+REGISTRY = []
+
+def _labels(label, value):
+    return f'{{{label}="{value}"}}' if label else ''
+
+class Counter:
+    __slots__ = ('name', 'help', 'label', 'values')
+
+    def __init__(self, name, help, label=None):
+        self.name, self.help, self.label = name, help, label
+        self.values = {}   # label value -> count
+
+    def inc(self, value=None, n=1):
+        v = self.values
+        v[value] = v.get(value, 0) + n
+
+    def render(self):
+        yield f'# HELP {self.name} {self.help}'
+        yield f'# TYPE {self.name} counter'
+        for value, n in sorted(self.values.items(), key=lambda e: str(e[0])):
+            yield f'{self.name}{_labels(self.label, value)} {n}'
+
+class Histogram:
+    __slots__ = ('name', 'help', 'label', 'buckets', 'series')
+
+    def __init__(self, name, help, label=None, buckets=BUCKETS):
+        self.name, self.help, self.label = name, help, label
+        self.buckets = buckets
+        self.series = {}   # label value -> [per-bucket counts (+Inf last), sum]
+
+    def observe(self, x, value=None):
+        s = self.series.get(value)
+        if s is None:
+            s = self.series[value] = [[0]*(len(self.buckets)+1), 0.0]
+        s[0][bisect.bisect_left(self.buckets, x)] += 1
+        s[1] += x
+
+    def render(self):
+        yield f'# HELP {self.name} {self.help}'
+        yield f'# TYPE {self.name} histogram'
+        for value, (counts, total) in sorted(self.series.items(), key=lambda e: str(e[0])):
+            lab = f'{self.label}="{value}",' if self.label else ''
+            cum = 0
+            for le, n in zip(self.buckets + ('+Inf',), counts):
+                cum += n
+                yield f'{self.name}_bucket{{{lab}le="{le}"}} {cum}'
+            yield f'{self.name}_sum{_labels(self.label, value)} {total}'
+            yield f'{self.name}_count{_labels(self.label, value)} {cum}'
+
+class Gauge:
+    __slots__ = ('name', 'help', 'fn', 'value')
+
+    def __init__(self, name, help, fn=None):
+        self.name, self.help = name, help
+        self.fn = fn       # read at scrape time; without one, inc()/dec() keep the value
+        self.value = 0
+
+    def inc(self, n=1): self.value += n
+    def dec(self, n=1): self.value -= n
+
+    def render(self):
+        yield f'# HELP {self.name} {self.help}'
+        yield f'# TYPE {self.name} gauge'
+        yield f'{self.name} {self.fn() if self.fn else self.value}'
+
+def counter(name, help, label=None):
+    m = Counter(name, help, label); REGISTRY.append(m); return m
+
+def histogram(name, help, label=None, buckets=BUCKETS):
+    m = Histogram(name, help, label, buckets); REGISTRY.append(m); return m
+
+def gauge(name, help, fn=None):
+    m = Gauge(name, help, fn); REGISTRY.append(m); return m
+
+def render():
+    return '\n'.join(line for m in REGISTRY for line in m.render()) + '\n'
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+connected = gauge('poker_connected_sids', 'Socket.IO connections to this worker')
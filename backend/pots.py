@@ -0,0 +1,46 @@
+# pots.py
+# Side pots, built once at the end of a hand from what every seat put in.
+#
+# Layers come from the distinct all-in levels of the seats still in the
+# hand: each layer holds min(committed, level) - min(committed, previous
+# level) from every seat (folded ones included) and is contested by the
+# in-hand seats that reached the level. Chips above the top level (bets
+# nobody still in the hand matched) join the top layer.
+
+def build_pots(committed, live):
+    # committed: chips per seat this hand; live: seat still in the hand
+    # -> [(amount, [eligible seat indexes])], main pot first
+    levels = sorted({c for c, ok in zip(committed, live) if ok})
+    pots, prev = [], 0
+    for lv in levels:
+        amount = sum(min(c, lv) - min(c, prev) for c in committed)
+        eligible = [i for i, c in enumerate(committed) if live[i] and c >= lv]
+        if amount: pots.append((amount, eligible))
+        prev = lv
+    rest = sum(c - prev for c in committed if c > prev)
+    if rest:
+        if pots: pots[-1] = (pots[-1][0] + rest, pots[-1][1])
+        else: pots.append((rest, [i for i, ok in enumerate(live) if ok]))
+    return pots
+
+def split(pots, ranked, first_seat, nb):
+    # ranked: [(seat, score, ...)] of the in-hand seats, best first
+    # (evaluator.rank_hands). Every layer's winners are the best eligible
+    # seats in that order. Odd chips go one each to the winners closest to
+    # the left of the button (first_seat = dealer + 1).
+    # -> {seat: chips won}
+    won = {}
+    for amount, eligible in pots:
+        ok = set(eligible)
+        best = None
+        winners = []
+        for i, score, *_ in ranked:
+            if i not in ok: continue
+            if best is None: best = score
+            elif score != best: break
+            winners.append(i)
+        winners.sort(key=lambda i: (i - first_seat) % nb)
+        share, odd = divmod(amount, len(winners))
+        for k, i in enumerate(winners):
+            won[i] = won.get(i, 0) + share + (k < odd)
+    return won
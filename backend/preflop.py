@@ -0,0 +1,104 @@
+# preflop.py
+# Preflop equities of the 169 starting-hand classes, computed offline with
+# equity.py's batch evaluator and memory-mapped from preflop.npy (TABLE and
+# TIES, stacked):
+#   TABLE[a, b]     equity of class a heads-up against class b (ties count
+#                   half), averaged over the suit combinations that can meet
+#   TABLE[169, a]   equity of class a against one random hand
+#   TIES[a, b]      how often the two split the pot; a wins TABLE - TIES/2
+# Classes sit on the usual 13x13 grid (rank 12 = ace):
+#   pair r: r*13 + r    suited hi,lo: hi*13 + lo    offsuit hi,lo: lo*13 + hi
+# Sampled, MATCHUP_SAMPLES boards per matchup: within about half a point.
+# Rebuild with `python preflop.py` (a few minutes); without the file TABLE
+# and TIES are None and the lookups return None.
+import os, sys, time
+import numpy as np
+from cards import RANKS
+from equity import evaluate_batch
+
+PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'preflop.npy')
+MATCHUP_SAMPLES = 10_000
+RANDOM_SAMPLES  = 200_000
+RANDOM = 169   # TABLE row of the random opponent
+
+def hand_class(c1, c2):
+    hi, lo = max(c1 >> 2, c2 >> 2), min(c1 >> 2, c2 >> 2)
+    if (c1 & 3) == (c2 & 3): return hi*13 + lo
+    return lo*13 + hi
+
+def class_name(i):
+    row, col = divmod(i, 13)
+    if row == col: return RANKS[row]*2
+    if row > col: return RANKS[row] + RANKS[col] + 's'
+    return RANKS[col] + RANKS[row] + 'o'
+
+def combos(i):
+    # every two-card hand of class i, as [c1, c2] with c1 > c2
+    row, col = divmod(i, 13)
+    hi, lo = max(row, col), min(row, col)
+    return [[hi*4 + s1, lo*4 + s2] for s1 in range(4) for s2 in range(4)
+            if (s1 == s2) == (row > col) and (hi != lo or s1 > s2)]
+
+def _load():
+    try:
+        data = np.load(PATH, mmap_mode='r')
+    except OSError:
+        return None, None
+    return data[0], data[1]
+
+TABLE, TIES = _load()
+
+def vs_random(cards):
+    return None if TABLE is None else float(TABLE[RANDOM, hand_class(*cards)])
+
+def matchup(cards, other):
+    return None if TABLE is None else float(TABLE[hand_class(*cards), hand_class(*other)])
+
+def heads_up(hands, dead=()):
+    # two hands, no board: the table's numbers in equity.py's result shape.
+    # The table averages over boards from the other 48 cards, so a spot with
+    # dead (folded) cards is not in it: None, simulate that one
+    if TABLE is None or dead: return None
+    a, b = hand_class(*hands[0]), hand_class(*hands[1])
+    eq, tie = float(TABLE[a, b]), float(TIES[a, b])
+    return {'win': [eq - tie/2, 1 - eq - tie/2], 'tie': [tie, tie], 'equity': [eq, 1 - eq],
+            'iterations': MATCHUP_SAMPLES, 'exact': False}
+
+# --------- offline build ----------
+def _sample_rows(rng, rem, n, need):
+    # n rows of `need` distinct cards, each row from its own rem[k] (48 or 50 cards)
+    pos = np.argsort(rng.random((n, rem.shape[1])), axis=1)[:, :need]
+    return np.take_along_axis(rem, pos, axis=1)
+
+def _share(a, b, board):
+    # -> (equity of a, how often they tie)
+    sa = evaluate_batch(np.hstack([a, board]))
+    sb = evaluate_batch(np.hstack([b, board]))
+    tie = (sa == sb).mean()
+    return (sa > sb).mean() + tie/2, tie
+
+def build(path=PATH, seed=169):
+    rng = np.random.default_rng(seed)
+    table, ties = np.zeros((2, 170, 169), dtype=np.float32)
+    hands = [np.array(combos(i), dtype=np.int64) for i in range(169)]
+    deck = np.arange(52)
+    t = time.perf_counter()
+    for i in range(169):
+        h = hands[i][0]   # every combo of a class does the same against a random hand
+        rem = np.broadcast_to(deck[(deck != h[0]) & (deck != h[1])], (RANDOM_SAMPLES, 50))
+        rows = _sample_rows(rng, rem, RANDOM_SAMPLES, 7)
+        table[RANDOM, i], ties[RANDOM, i] = _share(np.broadcast_to(h, (RANDOM_SAMPLES, 2)), rows[:, :2], rows[:, 2:])
+    for i in range(169):
+        for j in range(i, 169):
+            pairs = [(a, b) for a in hands[i] for b in hands[j] if len({*a, *b}) == 4]
+            pa, pb = np.array([a for a, _ in pairs]), np.array([b for _, b in pairs])
+            left = np.array([deck[~np.isin(deck, [*a, *b])] for a, b in pairs])
+            pick = rng.integers(0, len(pairs), MATCHUP_SAMPLES)
+            eq, tie = _share(pa[pick], pb[pick], _sample_rows(rng, left[pick], MATCHUP_SAMPLES, 5))
+            table[i, j], table[j, i] = eq, 1 - eq
+            ties[i, j] = ties[j, i] = tie
+        print(f'{class_name(i):>4} done, {time.perf_counter() - t:.0f}s', file=sys.stderr)
+    np.save(path, np.stack([table, ties]))
+
+if __name__ == '__main__':
+    build()
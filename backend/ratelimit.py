@@ -0,0 +1,91 @@
+# ratelimit.py
+# Token buckets in front of the Socket.IO handlers.
+#
+# A bucket holds up to `burst` tokens and refills at `rate` per second; an
+# event takes one token or is dropped. Buckets are two floats in a dict
+# keyed by sid (per event type) or by room (all events of a table, from
+# every connection through this worker), so checking costs a dict lookup
+# and a few float ops, before any room state or payload is touched.
+# No lock: two threads racing on one bucket can let one extra event in.
+#
+# Room codes come from the client, so the room buckets are capped: beyond
+# ROOM_KEYS the least recently used one goes, and comes back full if its
+# table sends again. (tables.admit charges no bucket for a code this
+# worker owns but has no table for.)
+#
+# A new connection starts with full per-sid buckets, so the events that
+# create state also take a token per client address (all of them share one
+# bucket when the transport cannot tell the address), capped the same way.
+import time
+from collections import OrderedDict
+
+# event -> (rate per second, burst) per connection
+LIMITS = {
+    'create_room':     (0.2, 3),
+    'join_room':       (2, 5),
+    'leave_room':      (2, 5),
+    'resync':          (2, 5),
+    'start_hand':      (5, 10),
+    'request_equity':  (1, 3),
+    'player_action':   (10, 20),
+    'create_tournament':   (0.2, 3),
+    'register_tournament': (1, 3),
+    'start_tournament':    (1, 3),
+    'tournament_state':    (2, 5),
+}
+ROOM_LIMIT = (200, 400)   # every event of one table
+ROOM_KEYS  = 50_000       # room buckets kept
+# event -> (rate per second, burst) per client address, over all its connections
+ADDR_LIMITS = {
+    'create_room':       (0.2, 10),
+    'create_tournament': (0.05, 5),
+}
+ADDR_KEYS = 50_000        # address buckets kept
+
+class Buckets:
+    __slots__ = ('rate', 'burst', 'state', 'max_keys')
+
+    def __init__(self, rate, burst, max_keys=None):
+        self.rate, self.burst, self.max_keys = rate, burst, max_keys
+        # key -> [tokens, last refill]; least recently used first when capped
+        self.state = {} if max_keys is None else OrderedDict()
+
+    def allow(self, key, now):
+        b = self.state.get(key)
+        if b is None:
+            self.state[key] = [self.burst - 1, now]
+            if self.max_keys is not None and len(self.state) > self.max_keys:
+                self.state.popitem(last=False)
+            return True
+        if self.max_keys is not None: self.state.move_to_end(key)
+        tokens = min(self.burst, b[0] + (now - b[1]) * self.rate)
+        b[1] = now
+        if tokens < 1:
+            b[0] = tokens
+            return False
+        b[0] = tokens - 1
+        return True
+
+    def forget(self, key):
+        self.state.pop(key, None)
+
+class Limiter:
+    def __init__(self, limits=LIMITS, room_limit=ROOM_LIMIT, room_keys=ROOM_KEYS,
+                 addr_limits=ADDR_LIMITS, addr_keys=ADDR_KEYS):
+        self.per_sid = {event: Buckets(*lim) for event, lim in limits.items()}
+        self.per_room = Buckets(*room_limit, max_keys=room_keys)
+        self.per_addr = {event: Buckets(*lim, max_keys=addr_keys) for event, lim in addr_limits.items()}
+
+    def allow(self, event, sid, room=None, addr=None):
+        now = time.monotonic()
+        b = self.per_sid.get(event)
+        a = self.per_addr.get(event)
+        return ((b is None or b.allow(sid, now))
+                and (a is None or a.allow(addr or '', now))
+                and (room is None or self.per_room.allow(room, now)))
+
+    def forget_sid(self, sid):
+        for b in self.per_sid.values(): b.forget(sid)
+
+    def forget_room(self, room):
+        self.per_room.forget(room)
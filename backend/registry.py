@@ -0,0 +1,55 @@
+# registry.py
+# The `rooms` dict of tables.py, kept in least-recently-used order.
+#
+# dispatch() touches a room on every client event, so iteration starts at
+# the coldest table. tables.sweep() walks it to find tables to evict and
+# seats to reap; the eviction itself runs on the room's own thread.
+# stats() is what /metrics reports about memory.
+import os, sys, time
+from collections import OrderedDict
+
+try:
+    PAGE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    PAGE = 4096
+
+class RoomRegistry(OrderedDict):
+    def __init__(self):
+        super().__init__()
+        self._stats = (0.0, None)   # (monotonic time, stats): one walk serves a whole scrape
+
+    def touch(self, room):
+        r = self.get(room)
+        if r is None: return
+        r.last_active = time.monotonic()
+        try:
+            self.move_to_end(room)
+        except KeyError:   # dropped meanwhile
+            pass
+
+    def stats(self, max_age=1.0):
+        # approximate: shallow sizes of the per-table objects, not the whole heap
+        at, st = self._stats
+        if st and time.monotonic() - at < max_age: return st
+        tables = list(self.values())
+        seats = away = size = 0
+        for r in tables:
+            seats += len(r.seats)
+            away += len(r.away)
+            size += (sys.getsizeof(r) + sys.getsizeof(r.seats) + sys.getsizeof(r.deck)
+                     + sys.getsizeof(r.last_pub or {}) + sys.getsizeof(r.last_priv)
+                     + sum(sys.getsizeof(p) + sys.getsizeof(p.cards) for p in r.seats))
+        st = {'rooms': len(tables), 'seats': seats, 'away': away,
+              'state_bytes': size, 'rss_bytes': rss_bytes()}
+        self._stats = (time.monotonic(), st)
+        return st
+
+def rss_bytes():
+    # resident set size now (Linux); peak RSS elsewhere
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * PAGE
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
@@ -0,0 +1,61 @@
+# scheduler.py
+# One process-wide hashed timer wheel for turn deadlines.
+#
+# A single background task advances the wheel every `tick` seconds and fires
+# the timers that came due. Timers live in dict buckets keyed by their handle,
+# so schedule() and cancel() are O(1) and neither starts a thread; resetting a
+# deadline is cancel() + schedule().
+import threading, time, traceback
+
+class Timer:
+    __slots__ = ('due', 'slot', 'fn', 'args')
+    def __init__(self, due, slot, fn, args):
+        self.due, self.slot, self.fn, self.args = due, slot, fn, args
+
+class TimerWheel:
+    def __init__(self, spawn, sleep, tick=0.25, slots=512):
+        # spawn/sleep come from the transport (socketio.start_background_task / socketio.sleep)
+        self.spawn, self.sleep = spawn, sleep
+        self.tick = tick
+        self.slots = [{} for _ in range(slots)]
+        self.lock = threading.Lock()
+        self.origin = time.monotonic()
+        self.cursor = 0        # last tick processed
+        self.pending = 0
+        self.started = False
+
+    def schedule(self, delay, fn, *args):
+        with self.lock:
+            if not self.started:
+                self.started = True
+                self.spawn(self._run)
+            due = max(self.cursor + 1, -int(-(time.monotonic() - self.origin + delay) // self.tick))
+            t = Timer(due, due % len(self.slots), fn, args)
+            self.slots[t.slot][t] = None
+            self.pending += 1
+            return t
+
+    def cancel(self, t):
+        if t is None: return
+        with self.lock:
+            if self.slots[t.slot].pop(t, 0) is None:
+                self.pending -= 1
+
+    def _run(self):
+        while True:
+            now = int((time.monotonic() - self.origin) // self.tick)
+            fired = []
+            with self.lock:
+                while self.cursor < now:
+                    self.cursor += 1
+                    bucket = self.slots[self.cursor % len(self.slots)]
+                    for t in [t for t in bucket if t.due <= self.cursor]:
+                        del bucket[t]
+                        fired.append(t)
+                self.pending -= len(fired)
+            for t in fired:
+                try:
+                    t.fn(*t.args)
+                except Exception:
+                    traceback.print_exc()
+            self.sleep(self.tick)
@@ -0,0 +1,153 @@
+# snapshots.py
+# Crash recovery files for tables.py: a journal of room events between
+# periodic snapshots of every room.
+#
+#   STATE_DIR/journal.<gen>   frames: u32 length, pickled (room, jseq, entry, deadline)
+#   STATE_DIR/snapshot        pickled {'gen': gen, 'rooms': {room: capture}}
+#
+# Every journaled room event carries the room's own sequence number (jseq).
+# Room threads only append a frame (one short locked write, like handlog);
+# the Checkpointer thread, every SNAPSHOT_SECS:
+#   1. rotates the journal to gen+1, so older gens stop growing
+#   2. asks every room whose jseq moved for a capture; the room takes it on
+#      its own thread between two events (a copy of a few seat tuples), so
+#      captures never race a handler and never hold one up
+#   3. pickles all captures to snapshot.tmp, fsyncs, renames over snapshot
+#   4. deletes the journals older than gen+1
+# load() returns the snapshot and the journal records to replay on top of
+# it: all gens >= the snapshot's, minus entries a capture already includes.
+# Frames are flushed, not fsynced: a killed process loses nothing, a power
+# cut can lose the last moments.
+import os, pickle, queue, struct, threading, time, traceback
+
+SNAPSHOT_SECS    = 5.0
+CAPTURE_TIMEOUT  = 5.0    # rooms that do not answer in time: try again next round
+
+_frame = struct.Struct('<I')
+
+def _journals(path):
+    # -> [(gen, file path)] oldest first
+    gens = []
+    for name in os.listdir(path):
+        if name.startswith('journal.') and name[8:].isdigit():
+            gens.append((int(name[8:]), os.path.join(path, name)))
+    return sorted(gens)
+
+class Journal:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        existing = _journals(path)
+        self.gen = existing[-1][0] + 1 if existing else 1   # never append to a file we may replay
+        self.f = open(os.path.join(path, f'journal.{self.gen}'), 'ab')
+        self.lock = threading.Lock()
+        self.records = 0
+
+    def append(self, room, jseq, entry, deadline):
+        data = pickle.dumps((room, jseq, entry, deadline), pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.f.write(_frame.pack(len(data)) + data)
+            self.f.flush()
+            self.records += 1
+
+    def rotate(self):
+        # -> the new gen; everything appended from now on lands in it
+        with self.lock:
+            self.f.close()
+            self.gen += 1
+            self.f = open(os.path.join(self.path, f'journal.{self.gen}'), 'ab')
+            return self.gen
+
+    def prune(self, gen):
+        for g, p in _journals(self.path):
+            if g < gen: os.remove(p)
+
+    def close(self):
+        with self.lock:
+            self.f.close()
+
+def _read_journal(path):
+    with open(path, 'rb') as f:
+        while True:
+            head = f.read(_frame.size)
+            if len(head) < _frame.size: return
+            (n,) = _frame.unpack(head)
+            data = f.read(n)
+            if len(data) < n: return   # torn tail from a crash
+            yield pickle.loads(data)
+
+def load(path):
+    # -> ({room: capture}, iterator of (room, jseq, entry, deadline) to replay)
+    snap = {'gen': 0, 'rooms': {}}
+    fn = os.path.join(path, 'snapshot')
+    if os.path.exists(fn):
+        with open(fn, 'rb') as f:
+            snap = pickle.load(f)
+    caps = snap['rooms']
+
+    def records():
+        for gen, p in _journals(path):
+            if gen < snap['gen']: continue
+            for room, jseq, entry, deadline in _read_journal(p):
+                cap = caps.get(room)
+                if cap is None or jseq > cap['jseq']:
+                    yield room, jseq, entry, deadline
+    return caps, records()
+
+class Checkpointer:
+    def __init__(self, journal, interval=SNAPSHOT_SECS):
+        self.journal = journal
+        self.interval = interval
+        self.caps = {}       # room -> last capture written
+        self.thread = None
+        self.written = 0
+        self.last_secs = 0.0
+        self.seen = 0        # journal records at the last checkpoint
+
+    def start(self, caps, jseqs, request):
+        # caps: what load() restored; jseqs() -> {room: jseq};
+        # request(room, reply) has the room call reply(room, capture) on its thread
+        self.caps = dict(caps)
+        self.jseqs, self.request = jseqs, request
+        self.seen = -1   # first round always writes: folds restored journals into a snapshot
+        self.thread = threading.Thread(target=self._run, name='checkpoint', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.checkpoint()
+            except Exception:
+                traceback.print_exc()
+
+    def checkpoint(self):
+        records = self.journal.records
+        if records == self.seen: return   # nothing happened since the last one
+        gen = self.journal.rotate()   # first: anything journaled after this is in gen
+        current = self.jseqs()
+        changed = [room for room, j in current.items()
+                   if room not in self.caps or self.caps[room]['jseq'] != j]
+        t = time.perf_counter()
+        replies = queue.Queue()
+        for room in changed:
+            self.request(room, lambda room, cap: replies.put((room, cap)))
+        caps = {room: self.caps[room] for room in current if room not in changed}
+        deadline = time.monotonic() + CAPTURE_TIMEOUT
+        for _ in changed:
+            try:
+                room, cap = replies.get(timeout=max(0, deadline - time.monotonic()))
+            except queue.Empty:
+                return   # keep the old snapshot and every journal it needs
+            if cap is not None: caps[room] = cap   # None: the room is gone
+        tmp = os.path.join(self.journal.path, 'snapshot.tmp')
+        with open(tmp, 'wb') as f:
+            pickle.dump({'gen': gen, 'rooms': caps}, f, pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.journal.path, 'snapshot'))
+        self.journal.prune(gen)
+        self.caps = caps
+        self.seen = records
+        self.written += 1
+        self.last_secs = time.perf_counter() - t
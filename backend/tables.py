@@ -0,0 +1,861 @@
+# tables.py
+# Table service shared by both transports: server.py (Flask-SocketIO,
+# threads) and aserver.py (python-socketio on asyncio). Everything here is
+# plain synchronous code; the transport bound with bind() supplies
+#   send(event, payload, to)          emit to a sid or a room
+#   submit(room, fn, *args)           run fn(*args) serialized per room
+#   schedule(delay, fn, *args) -> h   one-shot timer, cancel(h) drops it
+#   spawn(fn, *args)                  background work off the room (equity)
+#   open(room) / close(room)          per-room transport state
+#   queued()                          room events waiting to run (metrics)
+import os, uuid, time, threading, secrets
+from datetime import datetime
+from cards import to_strs
+from engine import (STARTING_CHIPS, SMALL_BLIND, BIG_BLIND, BETTING_STATES, Room, Seat,
+                    add_player, remove_player, rebind_player, fold_out, start_hand, act, relink, active_players_in_hand,
+                    compute_allowed_actions, hand_name)
+from equity import cached_equity, lookup as equity_lookup
+from preflop import heads_up
+from cluster import Router, make_broker
+from history import HandWriter
+from handlog import HandLog, HandRecorder
+from deck import DeckPool, commit, shuffle
+from snapshots import Journal, Checkpointer, load as load_state
+from registry import RoomRegistry
+from ratelimit import Limiter
+from tournament import Tournament
+import metrics
+
+# Multi-process mode: run NUM_WORKERS copies with WORKER_ID=0..N-1 and a
+# shared MESSAGE_QUEUE (redis://...). Tables are owned by hash of room code.
+MESSAGE_QUEUE = os.getenv('MESSAGE_QUEUE') or None
+WORKER_ID     = int(os.getenv('WORKER_ID', 0))
+NUM_WORKERS   = int(os.getenv('NUM_WORKERS', 1))
+HAND_HISTORY  = os.getenv('HAND_HISTORY', '1') != '0'   # persist finished hands (db.py)
+HAND_LOG      = os.getenv('HAND_LOG', f'hands-{WORKER_ID}.hlog')  # binary action log, '' = off
+STATE_DIR     = os.getenv('STATE_DIR', f'state-{WORKER_ID}')  # snapshots + journal to restore tables, '' = off
+RATE_LIMIT    = os.getenv('RATE_LIMIT', '1') != '0'   # token buckets per sid / room (ratelimit.py)
+
+router = Router(make_broker(MESSAGE_QUEUE), WORKER_ID, NUM_WORKERS)
+hand_writer = HandWriter()   # write-behind: the game thread never waits on the db
+hand_log = None              # HandLog(HAND_LOG), opened by start()
+deck_pool = DeckPool()       # pre-shuffled (seed, deck) pairs, see deck.py
+journal = None               # Journal(STATE_DIR) and its Checkpointer, made by start()
+checkpointer = None
+limiter = Limiter() if RATE_LIMIT else None
+transport = None
+
+def bind(t):
+    global transport
+    transport = t
+
+# ------------------------------------------------------------
+# Game state
+# ------------------------------------------------------------
+rooms = RoomRegistry()   # room code -> Table, least recently used first
+sessions = {}            # sid -> rooms it joined through this worker (for disconnects)
+tournaments = {}         # id -> Tournament; it and all its tables live on this worker
+emit_stats  = {}   # event handler name -> [events, emits, max emits in one event]
+_emits = threading.local()
+
+TURN_TIMEOUT   = 20  # seconds
+RUNOUT_PACE    = float(os.getenv('RUNOUT_PACE', 1.0))  # client-side seconds between all-in streets
+ROOM_IDLE_SECS = float(os.getenv('ROOM_IDLE_SECS', 1800))  # evict tables without client events this long
+MAX_ROOMS      = int(os.getenv('MAX_ROOMS', 10000))        # beyond this, evict the least recently used
+AWAY_GRACE     = float(os.getenv('AWAY_GRACE', 60))        # seconds before a disconnected seat is reaped
+HAND_STALE_SECS = float(os.getenv('HAND_STALE_SECS', 900))  # evict tables stuck in a hand this long
+SWEEP_SECS     = 10
+TOURNEY_SEATS  = int(os.getenv('TOURNEY_SEATS', 9))          # max players per tournament table
+TOURNEY_CHIPS  = int(os.getenv('TOURNEY_CHIPS', 1500))       # starting stack
+TOURNEY_LEVEL_SECS = float(os.getenv('TOURNEY_LEVEL_SECS', 300))   # blind level length
+TOURNEY_PAUSE  = 3   # seconds between hands at tournament tables
+TOURNEY_EXPIRE_SECS = float(os.getenv('TOURNEY_EXPIRE_SECS', 3600))  # drop unstarted / abandoned tournaments
+
+# ------------------------------------------------------------
+# Metrics (GET /metrics on either transport, see metrics.py)
+# ------------------------------------------------------------
+EVENT_SECONDS     = metrics.histogram('poker_event_seconds', 'Room event run time incl. its broadcast, by handler', 'handler')
+EMITS             = metrics.counter('poker_emits_total', 'Socket.IO emits, by event', 'event')
+BROADCAST_SECONDS = metrics.histogram('poker_broadcast_seconds', 'broadcast_room: diff and send time')
+BROADCAST_FANOUT  = metrics.histogram('poker_broadcast_fanout', 'broadcast_room: emits per broadcast',
+                                      buckets=(0, 1, 2, 4, 6, 8, 10, 16, 32))
+metrics.gauge('poker_rooms', 'Tables on this worker', lambda: len(rooms))
+metrics.gauge('poker_hands_running', 'Tables with a hand in progress',
+              lambda: sum(1 for r in list(rooms.values()) if r.state != 'waiting'))
+metrics.gauge('poker_turn_timers', 'Armed turn timers',
+              lambda: sum(1 for r in list(rooms.values()) if r.turn_timer is not None))
+metrics.gauge('poker_event_queue_depth', 'Room events waiting behind the running ones',
+              lambda: transport.queued())
+metrics.gauge('poker_deck_pool', 'Pre-shuffled decks ready', lambda: len(deck_pool.decks))
+metrics.gauge('poker_seats', 'Seats at all tables', lambda: rooms.stats()['seats'])
+metrics.gauge('poker_away_seats', 'Seats whose connection is gone, waiting to be reaped',
+              lambda: rooms.stats()['away'])
+metrics.gauge('poker_room_state_bytes', 'Approximate size of all table state',
+              lambda: rooms.stats()['state_bytes'])
+metrics.gauge('poker_process_rss_bytes', 'Resident set size of this worker',
+              lambda: rooms.stats()['rss_bytes'])
+metrics.gauge('poker_sessions', 'Connections that joined a table here', lambda: len(sessions))
+ROOMS_EVICTED = metrics.counter('poker_rooms_evicted_total', 'Tables dropped from memory, by reason', 'reason')
+SEATS_REAPED  = metrics.counter('poker_seats_reaped_total', 'Disconnected seats removed after AWAY_GRACE')
+RATE_LIMITED  = metrics.counter('poker_rate_limited_total', 'Socket.IO events dropped by the rate limiter', 'event')
+EQUITY_CACHE  = metrics.counter('poker_equity_cache_total', 'Equity requests by cache result, or preflop for the table (equity.py, preflop.py)', 'result')
+SEATS_MOVED   = metrics.counter('poker_tournament_moves_total', 'Tournament players moved to another table')
+metrics.gauge('poker_tournaments', 'Tournaments on this worker', lambda: len(tournaments))
+if STATE_DIR:
+    metrics.gauge('poker_snapshot_last_seconds', 'Capture + write time of the last snapshot',
+                  lambda: checkpointer.last_secs if checkpointer else 0)
+    metrics.gauge('poker_journal_records', 'Room events journaled since start',
+                  lambda: journal.records if journal else 0)
+
+# ------------------------------------------------------------
+# Room helpers
+# ------------------------------------------------------------
+class Table(Room):
+    # engine.Room plus what the server keeps per table
+    __slots__ = ('turn_deadline', 'turn_timer', 'seq', 'last_pub', 'last_priv', 'dirty',
+                 'hand_started_at', 'deck_seed', 'deck_commit', 'jseq',
+                 'last_active', 'away', 'tokens', 'allin', 'tournament', 'next_deal')
+
+    def __init__(self):
+        super().__init__()
+        self.turn_deadline = None
+        self.turn_timer = None    # scheduler handle for turn_deadline
+        self.seq = 0              # room_delta sequence
+        self.last_pub = None      # public state as of seq
+        self.last_priv = {}       # sid -> (seq, private state) for player_delta
+        self.dirty = False        # state changed since the last broadcast_room
+        self.hand_started_at = None
+        self.deck_seed = None     # this hand's shuffle seed, revealed at the end
+        self.deck_commit = None   # sha256 of deck_seed, public from the deal
+        self.jseq = 0             # journaled events so far (snapshots.py)
+        self.last_active = time.monotonic()   # last client event (registry.py)
+        self.away = {}            # sid -> time.time() its connection went away
+        self.tokens = {}          # sid -> rejoin token of its seat, given only to that sid
+        self.allin = None         # last hand's all-in spot, for request_equity
+        self.tournament = None    # Tournament this table belongs to (tournament.py)
+        self.next_deal = False    # tournament: next hand already scheduled
+
+def make_room():
+    code = str(uuid.uuid4())[:8]
+    while not router.owns(code) or code in rooms:  # tables live on their owner
+        code = str(uuid.uuid4())[:8]
+    rooms[code] = Table()
+    transport.open(code)
+    journal_event(code, 'open')
+    return code
+
+def post(room, fn, *args):
+    # run fn(room, *args) on the room (strictly ordered per room)
+    if room in rooms: transport.submit(room, run_event, room, fn, args)
+
+# Transports call admit() first thing in every socket handler: a flood is
+# dropped (and counted) before anything is dispatched or emitted. addr is
+# the client's address, for the events limited across its connections.
+def admit(event, sid, room=None, addr=None):
+    if limiter is None: return True
+    if room is not None and router.owns(room) and room not in rooms:
+        room = None   # dispatch drops it anyway; no bucket for made-up codes
+    if limiter.allow(event, sid, room, addr): return True
+    RATE_LIMITED.inc(event)
+    return False
+
+# Socket events arrive on whichever worker holds the connection. dispatch()
+# runs them on the table's owner, forwarding by handler name when that is
+# another worker; ROUTED lists the handlers that may be forwarded.
+ROUTED = {}
+REPORT_MISSING = ('handle_join', 'handle_equity')   # reply 'Room not found'
+
+def routed(fn):
+    ROUTED[fn.__name__] = fn
+    return fn
+
+def dispatch(room, fn, sid, *args):
+    if room is None: return
+    if not router.owns(room):
+        router.forward(room, fn.__name__, (sid,) + args); return
+    if room not in rooms:
+        if fn.__name__ in REPORT_MISSING:
+            send('error', {'message': 'Room not found'}, room=sid)
+        return
+    rooms.touch(room)
+    post(room, fn, sid, *args)
+
+def on_forwarded(room, name, args):
+    fn = ROUTED.get(name)
+    if fn: dispatch(room, fn, *args)
+    elif name in TOURNEY_ROUTED: TOURNEY_ROUTED[name](*args)   # room: the tournament id
+
+def run_event(room, fn, args):
+    # one event = one flush: handlers only mark the room dirty, and the state
+    # deltas go out once here however many transitions the event went through
+    if room not in rooms: return   # closed while this event waited
+    _emits.n = 0
+    t = time.perf_counter()
+    fn(room, *args)
+    r = rooms.get(room)
+    if r and r.dirty: broadcast_room(room)
+    EVENT_SECONDS.observe(time.perf_counter() - t, fn.__name__)
+    st = emit_stats.setdefault(fn.__name__, [0, 0, 0])
+    st[0] += 1; st[1] += _emits.n; st[2] = max(st[2], _emits.n)
+
+def send(event, payload, room):
+    _emits.n = getattr(_emits, 'n', 0) + 1
+    EMITS.inc(event)
+    transport.send(event, payload, room)
+
+def mark_dirty(room):
+    rooms[room].dirty = True
+
+def emit_report():
+    # emits produced per event type, to spot handlers that fan out too much
+    return {name: {'events': n, 'emits': e, 'avg': round(e/n, 2) if n else 0, 'max': mx}
+            for name,(n,e,mx) in emit_stats.items()}
+
+def public_state(r):
+    return {
+        'players': [{'sid':p.sid,'name':p.name,'chips':p.chips,'in_hand':p.in_hand}
+                    for p in r.seats],
+        'community': to_strs(r.community),
+        'pot': r.pot,
+        'state': r.state,
+        'dealer': r.seats[r.dealer_idx].sid if r.seats else None,
+        'current_to': r.seats[r.current_to_idx].sid if r.seats else None,
+        'current_bet': r.current_bet,
+        'turn_deadline': r.turn_deadline,
+        'deck_commit': r.deck_commit
+    }
+
+def private_state(r, sid):
+    p = r.by_sid.get(sid)
+    return {
+        'your_cards': to_strs(p.cards if p else []),
+        'allowed_actions': compute_allowed_actions(r, sid)
+    }
+
+def diff_state(old, new):
+    if old is None: return dict(new)
+    return {k:v for k,v in new.items() if old.get(k) != v}
+
+# Versioned deltas: 'room_delta' to the room and 'player_delta' to each seat
+# carry only the fields that changed, each stream with its own seq. Clients
+# get full snapshots ('room_update'/'player_update' + seq) on join and when
+# they report a gap with 'resync'.
+def broadcast_room(room):
+    if room not in rooms: return
+    t, n = time.perf_counter(), getattr(_emits, 'n', 0)
+    r = rooms[room]
+    r.dirty = False
+    pub = public_state(r)
+    changes = diff_state(r.last_pub, pub)
+    if changes:
+        r.seq += 1
+        r.last_pub = pub
+        send('room_delta', {'seq': r.seq, 'changes': changes}, room=room)
+    # private
+    for p in r.seats:
+        sid = p.sid
+        priv = private_state(r, sid)
+        last = r.last_priv.get(sid)
+        changes = diff_state(last[1] if last else None, priv)
+        if changes:
+            seq = last[0]+1 if last else 1
+            r.last_priv[sid] = (seq, priv)
+            send('player_delta', {'seq': seq, 'changes': changes}, room=sid)
+    BROADCAST_FANOUT.observe(getattr(_emits, 'n', 0) - n)
+    BROADCAST_SECONDS.observe(time.perf_counter() - t)
+
+@routed
+def send_snapshot(room, sid):
+    r = rooms[room]
+    broadcast_room(room)  # bring last_pub / last_priv up to date first
+    send('room_update', {**r.last_pub, 'seq': r.seq}, room=sid)
+    last = r.last_priv.get(sid)
+    if last:
+        send('player_update', {**r.last_pub, **last[1], 'seq': last[0]}, room=sid)
+
+# ------------------------------------------------------------
+# Turn timer (server authoritative)
+# ------------------------------------------------------------
+def cancel_turn_timer(room):
+    r = rooms.get(room)
+    if not r: return
+    transport.cancel(r.turn_timer)
+    r.turn_timer = None
+    r.turn_deadline = None
+
+def start_turn_timer_for_current(room):
+    r = rooms.get(room);
+    if not r: return
+    transport.cancel(r.turn_timer)
+    r.turn_timer = None
+    deadline = time.time() + TURN_TIMEOUT
+    r.turn_deadline = deadline
+    idx = r.current_to_idx
+    if idx<0 or idx>=len(r.seats): mark_dirty(room); return
+    mark_dirty(room)
+    r.turn_timer = transport.schedule(TURN_TIMEOUT, post, room, on_turn_timeout, deadline)
+
+def on_turn_timeout(room, deadline):
+    r = rooms.get(room)
+    if not r: return
+    # still the same turn? Times out whoever holds it now: the seat may be
+    # under a new sid (a reclaim does not re-arm the timer)
+    if r.turn_deadline != deadline or r.state not in BETTING_STATES: return
+    r.turn_timer = None
+    sid = r.seats[r.current_to_idx].sid
+    out = []
+    if act(r, sid, 'timeout', 0, out) is None:   # auto-fold, same path as 'fold'
+        apply(room, out)
+        journal_event(room, 'act', sid, 'timeout', 0)
+
+# ------------------------------------------------------------
+# Equity (cached, else runs as a background task bounded by equity.py budgets)
+# ------------------------------------------------------------
+@routed
+def handle_equity(room, sid):
+    r = rooms[room]
+    # the numbers follow from every contender's cards, so a second socket or
+    # seat would learn the others' hands while they can still act on it: only
+    # the spot where everyone left went all-in is shown, once the hand is over
+    if r.state != 'waiting' or not r.allin:
+        send('error', {'message': 'Equity is shown for an all-in, once the hand is over'}, room=sid); return
+    state, board, dead, contenders = r.allin
+    hands = [cards for _,_,cards in contenders]
+    res = heads_up(hands, dead) if not board and len(hands) == 2 else None
+    if res is not None:   # the precomputed table (preflop.py)
+        EQUITY_CACHE.inc('preflop')
+        emit_equity(room, sid, state, board, contenders, res); return
+    res = equity_lookup(hands, board, dead)
+    EQUITY_CACHE.inc('miss' if res is None else 'hit')
+    if res is not None:
+        emit_equity(room, sid, state, board, contenders, res); return
+    # simulate off the room so the table keeps processing events
+    transport.spawn(equity_worker, room, sid, state, board, dead, contenders)
+
+def equity_worker(room, sid, state, board, dead, contenders):
+    res = cached_equity([cards for _,_,cards in contenders], board, dead)
+    post(room, emit_equity, sid, state, board, contenders, res)
+
+def emit_equity(room, sid, state, board, contenders, res):
+    send('equity', {
+        'room': room,
+        'state': state,
+        'community': to_strs(board),
+        'players': [{'sid':s,'name':name,'win':res['win'][i],'tie':res['tie'][i],'equity':res['equity'][i]}
+                    for i,(s,name,_) in enumerate(contenders)],
+        'iterations': res['iterations'],
+        'exact': res['exact']
+    }, room=sid)
+
+# ------------------------------------------------------------
+# Table events (the transports' socket handlers dispatch these)
+# ------------------------------------------------------------
+@routed
+def handle_join(room, sid, data):
+    name = data.get('name') or 'Player'
+    r = rooms[room]
+    # a seat whose connection went (or that came back from a restart) goes
+    # back to whoever shows its rejoin token, which only its player was sent
+    token = data.get('token')
+    old = next((s for s, tok in r.tokens.items() if tok == token), None) if token else None
+    if old is not None and old != sid:
+        reclaim(room, old, sid)
+    elif old is None and token and r.tournament:
+        seat = r.tournament.where(token)   # moved to another table meanwhile
+        if seat and seat[0] != room:
+            send('seated', {'tournament': r.tournament.id, 'room': seat[0], 'chips': seat[1],
+                            'token': token}, room=sid)
+    p = r.by_sid.get(sid)
+    # joining again keeps the seat (and takes back a leave still waiting on
+    # the hand); the tournament seats its players, joining only watches
+    if p or r.tournament:
+        r.away.pop(sid, None)
+        send('joined', {'room':room, 'name':p.name if p else name, 'chips':p.chips if p else 0,
+                        'token':r.tokens.get(sid)}, room=sid)
+        send_snapshot(room, sid)
+        return
+    add_player(r, sid, name)
+    token = r.tokens[sid] = secrets.token_hex(16)
+    journal_event(room, 'join', sid, name, STARTING_CHIPS, token)
+    send('joined', {'room':room, 'name':name, 'chips':STARTING_CHIPS, 'token':token}, room=sid)
+    send_snapshot(room, sid)
+
+def reclaim(room, old, sid):
+    r = rooms[room]
+    rebind_seat(r, old, sid)
+    if r.tournament: r.tournament.rebind(old, sid)
+    r.last_priv.pop(old, None)
+    mark_dirty(room)
+    journal_event(room, 'rebind', old, sid)
+
+def rebind_seat(r, old, sid):
+    rebind_player(r, old, sid)
+    r.away.pop(old, None)
+    token = r.tokens.pop(old, None)
+    if token: r.tokens[sid] = token
+
+@routed
+def handle_leave(room, sid):
+    r = rooms[room]
+    if r.tournament: return   # seats stay until busted or moved; an empty one is blinded off
+    unseat(room, sid)
+
+def unseat(room, sid):
+    r = rooms[room]
+    out = []
+    leave_seat(r, sid, out)
+    if sid not in r.by_sid: r.last_priv.pop(sid, None)
+    apply(room, out)
+    mark_dirty(room)
+    journal_event(room, 'leave', sid)
+
+def leave_seat(r, sid, out):
+    # mid-hand the seat folds and stays until the hand is over, its chips
+    # in the pot; away since forever, the reap after the hand removes it
+    if r.state != 'waiting' and sid in r.by_sid:
+        fold_out(r, sid, out)
+        r.away[sid] = 0
+    else:
+        remove_player(r, sid)
+        r.away.pop(sid, None)
+        r.tokens.pop(sid, None)
+
+@routed
+def handle_disconnect(room, sid):
+    r = rooms[room]
+    if sid in r.by_sid: r.away.setdefault(sid, time.time())
+
+@routed
+def handle_start(room, sid):
+    err = 'Tournament tables deal by themselves' if rooms[room].tournament else deal(room)
+    if err: send('error', {'message': err}, room=sid)
+
+def deal(room):
+    r = rooms[room]
+    out = []
+    seed, deck = deck_pool.draw()
+    err = start_hand(r, out, room, record=hand_log is not None, deck=deck)
+    if err: return err
+    r.allin = None
+    r.hand_started_at = datetime.utcnow()
+    r.deck_seed, r.deck_commit = seed, commit(seed)
+    apply(room, out)
+    journal_event(room, 'start', seed, r.hand_started_at, r.small_blind, r.big_blind)
+
+@routed
+def handle_action(room, sid, data):
+    out = []
+    action, amount = data.get('action'), int(data.get('amount', 0))
+    err = act(rooms[room], sid, action, amount, out)
+    if err: send('error', {'message': err}, room=sid)
+    apply(room, out)
+    if not err: journal_event(room, 'act', sid, action, amount)
+
+# ------------------------------------------------------------
+# Engine output -> emits / timers / logs
+# ------------------------------------------------------------
+ALLIN_STREET = {0: 'preflop', 3: 'flop', 4: 'turn'}   # board at the all-in -> its street
+
+def apply(room, out):
+    r = rooms[room]
+    runout = None
+    for ev in out:
+        kind = ev[0]
+        if kind == 'message':
+            send('message', {'msg': ev[1]}, room=room)
+        elif kind == 'turn':
+            start_turn_timer_for_current(room)  # also broadcasts
+        elif kind == 'end_turn':
+            cancel_turn_timer(room)
+        elif kind == 'hand_started':
+            send('hand_started', {}, room=room)
+        elif kind == 'runout':
+            runout = [{'street':state, 'cards':to_strs(cards)} for state, cards in ev[1]]
+            board = r.community[:len(r.community) - sum(len(cards) for _, cards in ev[1])]
+            r.allin = (ALLIN_STREET[len(board)], board,
+                       [c for p in r.seats if not p.in_hand for c in p.cards],
+                       [(p.sid, p.name, list(p.cards)) for p in active_players_in_hand(r)])
+        elif kind == 'showdown':
+            payload = {'winners':[{'sid':sid,'name':r.by_sid[sid].name,
+                                   'hand_name':hand_name(score),
+                                   'combo':' '.join(to_strs(combo))} for sid, score, combo in ev[1]],
+                       'community':to_strs(r.community)}
+            if runout:   # all-in: the whole board in this one emit, the client reveals it street by street
+                payload['runout'] = runout
+                payload['pace'] = RUNOUT_PACE
+            send('showdown', payload, room=room)
+        elif kind == 'hand_end':
+            finish_hand(room, *ev[1:])
+
+def finish_hand(room, winners, pot, results):
+    r = rooms[room]
+    busted = [(sid, -delta) for sid, chips, delta in results if chips == 0]
+    results = [{'sid':sid,'name':r.by_sid[sid].name,'final_chips':chips,'delta':delta}
+               for sid, chips, delta in results]
+    reveal = {'deck_seed': r.deck_seed.hex(), 'deck_commit': r.deck_commit}
+    send('showdown', {'results':results, 'community':to_strs(r.community), **reveal}, room=room)
+    if r.recorder:
+        hand_log.append(r.recorder)
+        r.recorder = None
+    if HAND_HISTORY:
+        hand_writer.record(room, r.hand_started_at, datetime.utcnow(), {
+            'winners': [{'sid':sid,'name':r.by_sid[sid].name} for sid in winners],
+            'pot': pot,
+            'community': to_strs(r.community),
+            'results': results,
+            **reveal
+        })
+    mark_dirty(room)
+    # between hands is the only time seats can go; posted, so the event that
+    # ended the hand is journaled before the seats it frees
+    if r.tournament: post(room, tourney_checkin, busted)
+    else: post(room, reap_seats)
+
+# ------------------------------------------------------------
+# Room registry: idle tables and disconnected seats (registry.py)
+# ------------------------------------------------------------
+# The transports report joins, leaves and disconnects of their connections;
+# a disconnect marks the sid's seats away. Every SWEEP_SECS sweep() walks
+# the tables coldest first and posts reap_room to the ones with something
+# to drop, which decides again on the table's own thread. Nothing is
+# dropped mid-hand: a seat whose player is gone times out of the hand
+# first, and a finished hand is already with hand_log / hand_writer.
+def joined(sid, room):
+    sessions.setdefault(sid, set()).add(room)
+
+def left(sid, room):
+    s = sessions.get(sid)
+    if s:
+        s.discard(room)
+        if not s: del sessions[sid]
+
+def disconnected(sid):
+    if limiter: limiter.forget_sid(sid)
+    for room in sessions.pop(sid, ()):
+        dispatch(room, handle_disconnect, sid)
+
+def sweep():
+    try:
+        now, mono = time.time(), time.monotonic()
+        over = len(rooms) - MAX_ROOMS
+        spare = []   # (has live seats, room): what too many tables evict, least recently used first
+        for room, r in list(rooms.items()):
+            idle = mono - r.last_active
+            if r.state != 'waiting':   # turns time out, so a hand this quiet is stuck
+                if idle >= HAND_STALE_SECS: post(room, reap_room, 'stale')
+                continue
+            if r.tournament: continue   # tournaments close their own
+            if idle >= ROOM_IDLE_SECS or (not r.seats and idle >= AWAY_GRACE):
+                post(room, reap_room, 'idle')
+                over -= 1
+                continue
+            if over > 0: spare.append((len(r.away) < len(r.seats), room))
+            if any(now - t >= AWAY_GRACE for t in list(r.away.values())):
+                post(room, reap_room, None)
+        # empty and all-away tables go before any with a player still there
+        spare.sort(key=lambda e: e[0])
+        for _, room in spare[:max(0, over)]:
+            post(room, reap_room, 'lru')
+        for t in list(tournaments.values()):
+            if t.started_at is None: gone = mono - t.created_at >= TOURNEY_EXPIRE_SECS
+            else: gone = all(tables_abandoned(t, now))
+            if gone: expire_tournament(t)
+    finally:
+        transport.schedule(SWEEP_SECS, sweep)
+
+def reap_seats(room):
+    r = rooms[room]
+    if r.state != 'waiting': return
+    now = time.time()
+    for sid, since in list(r.away.items()):
+        if now - since >= AWAY_GRACE:
+            handle_leave(room, sid)
+            SEATS_REAPED.inc()
+
+def reap_room(room, reason):
+    # reason: 'lru' / 'idle' = evict the table, None = only reap seats,
+    # 'stale' = a hand stopped moving: a cash table is evicted, a tournament
+    # table gets its turn timer back so the hand times out to its end
+    r = rooms[room]
+    if reason == 'stale':
+        if r.state == 'waiting' or time.monotonic() - r.last_active < HAND_STALE_SECS: return
+        if r.tournament:
+            start_turn_timer_for_current(room)
+            rooms.touch(room)   # or the next sweep re-arms it again before it fires
+        else: close_room(room, 'stale')
+        return
+    if r.state != 'waiting': return
+    reap_seats(room)
+    idle = time.monotonic() - r.last_active
+    if reason == 'lru' or idle >= ROOM_IDLE_SECS or (not r.seats and idle >= AWAY_GRACE):
+        close_room(room, reason or 'idle')
+
+def close_room(room, reason):
+    # whoever is still at the table (or watching) is told before it goes
+    cancel_turn_timer(room)
+    send('room_closed', {'room': room, 'reason': reason}, room=room)
+    journal_event(room, 'close')
+    del rooms[room]
+    transport.close(room)
+    if limiter: limiter.forget_room(room)
+    ROOMS_EVICTED.inc(reason)
+
+# ------------------------------------------------------------
+# Tournaments (tournament.py)
+# ------------------------------------------------------------
+# The transports call create/register/start_tournament and tournament_state
+# directly, like make_room. Everything else runs on the tables' own
+# threads: a tournament table deals itself TOURNEY_PAUSE after each hand
+# and after each hand checks in, which busts its zero stacks and moves
+# players off it if the tournament says so. A moved player's seat is
+# posted to the new table; the client gets 'seated' with the room code and
+# joins it like any room. Tournaments are not journaled: after a restart
+# their tables come back as plain tables.
+#
+# With several workers a tournament lives on the worker owning its id, the
+# way a table lives on the owner of its code: its id and its tables' codes
+# are picked so that this worker owns them, and events naming it that
+# reach another worker are forwarded here (TOURNEY_ROUTED).
+TOURNEY_ROUTED = {}
+
+def tourney_routed(fn):
+    TOURNEY_ROUTED[fn.__name__] = fn
+    return fn
+
+def create_tournament(sid, data):
+    seats = min(max(int(data.get('seats') or TOURNEY_SEATS), 2), 10)
+    t = Tournament(sid, seats, TOURNEY_CHIPS, TOURNEY_LEVEL_SECS)
+    while not router.owns(t.id) or t.id in tournaments:
+        t.id = str(uuid.uuid4())[:8]
+    tournaments[t.id] = t
+    send('tournament_created', {'tournament': t.id, 'seats': seats, 'chips': t.chips}, room=sid)
+
+def find_tournament(fn, sid, data):
+    # the tournament, or None when it is not here (forwarded to its owner
+    # if that is another worker)
+    tid = data.get('tournament')
+    if isinstance(tid, str) and not router.owns(tid):
+        router.forward(tid, fn.__name__, (sid, data)); return None
+    t = tournaments.get(tid)
+    if t is None: send('error', {'message': 'Tournament not found'}, room=sid)
+    return t
+
+@tourney_routed
+def register_tournament(sid, data):
+    t = find_tournament(register_tournament, sid, data)
+    if t is None: return
+    err = t.register(sid, data.get('name') or 'Player', data.get('token'))
+    if err: send('error', {'message': err}, room=sid)
+    else: send('tournament', {**t.standings(), 'token': t.tokens[sid]}, room=sid)
+
+@tourney_routed
+def start_tournament(sid, data):
+    t = find_tournament(start_tournament, sid, data)
+    if t is None: return
+    def new_table():
+        room = make_room()
+        rooms[room].tournament = t
+        return room
+    err, seating = t.start(sid, new_table)
+    if err:
+        send('error', {'message': err}, room=sid); return
+    for room, players in seating.items():
+        for psid, name in players:
+            post(room, tourney_seat, psid, name, t.chips)
+
+@tourney_routed
+def tournament_state(sid, data):
+    t = find_tournament(tournament_state, sid, data)
+    if t: send('tournament', t.standings([sid]), room=sid)
+
+def tourney_seat(room, sid, name, chips):
+    r = rooms[room]
+    if not r.tournament.arrived(sid, room): return   # sent on from here already
+    add_player(r, sid, name, chips)
+    token = r.tokens[sid] = r.tournament.tokens[sid]   # the player's for the whole tournament
+    journal_event(room, 'join', sid, name, chips, token)
+    joined(sid, room)
+    send('seated', {'tournament': r.tournament.id, 'room': room, 'chips': chips, 'token': token}, room=sid)
+    mark_dirty(room)
+    deal_soon(room)
+
+def tables_abandoned(t, now):
+    # per table: gone, or every player at it disconnected TOURNEY_EXPIRE_SECS ago
+    with t.lock: codes = list(t.count)
+    for room in codes:
+        r = rooms.get(room)
+        away = dict(r.away) if r else {}
+        yield r is None or all(p.sid in away and now - away[p.sid] >= TOURNEY_EXPIRE_SECS for p in list(r.seats))
+
+def expire_tournament(t):
+    tournaments.pop(t.id, None)
+    with t.lock: sids, codes = list(t.entries), list(t.count)
+    for sid in sids: send('tournament_closed', {'tournament': t.id}, room=sid)
+    for room in codes: post(room, close_room, 'abandoned')
+
+def deal_soon(room):
+    r = rooms[room]
+    if r.next_deal or r.state != 'waiting' or len(r.seats) < 2: return
+    r.next_deal = True
+    transport.schedule(TOURNEY_PAUSE, post, room, tourney_deal)
+
+def tourney_deal(room):
+    r = rooms[room]
+    r.next_deal = False
+    t = r.tournament
+    if t is None or t.finished or r.state != 'waiting': return
+    _, sb, bb, _ = t.blinds()
+    if (sb, bb) != (r.small_blind, r.big_blind):
+        r.small_blind, r.big_blind = sb, bb
+        send('message', {'msg': f'Blinds are now {sb}/{bb}'}, room=room)
+    deal(room)
+
+def tourney_checkin(room, busted=()):
+    r = rooms[room]
+    t = r.tournament
+    if t is None or r.state != 'waiting': return   # mid-hand: it checks in when the hand ends
+    for sid, _ in busted:
+        unseat(room, sid)
+        left(sid, room)
+    nb = len(r.seats)
+    order = [r.seats[(r.dealer_idx + 3 + i) % nb] for i in range(nb)]   # next big blind moves first
+    moves, wake = t.checkin(room, [(p.sid, p.chips) for p in order], busted)
+    for sid, _ in busted:
+        send('busted', {'tournament': t.id, 'place': t.places[sid]}, room=sid)
+    for sid, to in moves:
+        if sid in r.by_sid:   # else it was on its way here: only send it on
+            unseat(room, sid)
+            left(sid, room)
+        post(to, tourney_seat, sid, t.entries[sid], t.board.chips(sid))
+        SEATS_MOVED.inc()
+    if wake: post(wake, tourney_checkin)
+    if r.seats:
+        send('tournament', t.standings([p.sid for p in r.seats]), room=room)
+    if t.finished:
+        tournaments.pop(t.id, None)
+        r.tournament = None   # the winner's table is a plain table from here
+    elif not r.seats:
+        close_room(room, 'broken')
+    else:
+        deal_soon(room)
+
+# ------------------------------------------------------------
+# Crash recovery: journal + snapshots (snapshots.py)
+# ------------------------------------------------------------
+# Handlers journal what they did after doing it, with the turn deadline it
+# left; replay() redoes the same engine calls without emitting. 'start'
+# carries the deck seed, so a replayed hand deals the same cards.
+def journal_event(room, *entry):
+    r = rooms[room]
+    r.jseq += 1
+    if journal: journal.append(room, r.jseq, entry, r.turn_deadline)
+
+def capture(r):
+    # the table as plain values, taken between two events on its own thread
+    rec = r.recorder
+    return {
+        'jseq': r.jseq,
+        'seats': [(p.sid, p.name, p.chips, bytes(p.cards), p.in_hand, p.contribution,
+                   p.has_acted, p.committed, p.chips_before_hand) for p in r.seats],
+        'deck': bytes(r.deck), 'community': bytes(r.community), 'pot': r.pot,
+        'dealer_idx': r.dealer_idx, 'current_to_idx': r.current_to_idx,
+        'current_bet': r.current_bet, 'state': r.state, 'turn_deadline': r.turn_deadline,
+        'blinds': (r.small_blind, r.big_blind),
+        'tokens': dict(r.tokens),
+        'deck_seed': r.deck_seed, 'deck_commit': r.deck_commit,
+        'hand_started_at': r.hand_started_at,
+        'recorder': (bytes(rec.buf), rec.seats.copy()) if rec else None,
+    }
+
+def capture_room(room, reply):
+    reply(room, capture(rooms[room]))
+
+def request_capture(room, reply):
+    if room in rooms: post(room, capture_room, reply)
+    else: reply(room, None)
+
+def restore_table(cap):
+    r = Table()
+    for sid, name, chips, cards, in_hand, contribution, has_acted, committed, before in cap['seats']:
+        p = Seat(sid, name, chips)
+        p.cards, p.in_hand, p.contribution = list(cards), in_hand, contribution
+        p.has_acted, p.committed, p.chips_before_hand = has_acted, committed, before
+        r.seats.append(p)
+        r.by_sid[sid] = p
+    r.deck = bytearray(cap['deck'])
+    r.community = list(cap['community'])
+    for k in ('pot', 'dealer_idx', 'current_to_idx', 'current_bet', 'state', 'turn_deadline',
+              'deck_seed', 'deck_commit', 'hand_started_at', 'jseq'):
+        setattr(r, k, cap[k])
+    r.small_blind, r.big_blind = cap.get('blinds', (SMALL_BLIND, BIG_BLIND))
+    r.tokens = dict(cap.get('tokens', {}))
+    if cap['recorder']: r.recorder = HandRecorder.resume(*cap['recorder'])
+    relink(r)   # ring and counters follow from the seats
+    return r
+
+def replay(room, jseq, entry, deadline):
+    kind = entry[0]
+    if kind == 'open':
+        rooms[room] = Table()
+    r = rooms.get(room)
+    if r is None: return
+    out = []
+    if kind == 'join':
+        _, sid, name, *rest = entry   # + chips, token
+        add_player(r, sid, name, *rest[:1])
+        if rest[1:]: r.tokens[sid] = rest[1]
+    elif kind == 'leave':
+        leave_seat(r, entry[1], out)
+    elif kind == 'rebind':
+        rebind_seat(r, *entry[1:])
+    elif kind == 'start':
+        _, seed, started_at, *blinds = entry
+        if blinds: r.small_blind, r.big_blind = blinds
+        start_hand(r, out, room, record=hand_log is not None, deck=shuffle(seed))
+        r.deck_seed, r.deck_commit, r.hand_started_at = seed, commit(seed), started_at
+    elif kind == 'act':
+        act(r, *entry[1:], out)
+    elif kind == 'close':
+        del rooms[room]; return
+    if any(ev[0] == 'hand_end' for ev in out):
+        r.recorder = None   # finish_hand logged it before the crash
+    r.jseq, r.turn_deadline = jseq, deadline
+
+def restore():
+    # load the snapshot, replay the journal on top, re-arm the turn timers
+    t = time.perf_counter()
+    caps, records = load_state(STATE_DIR)
+    for room, cap in caps.items():
+        rooms[room] = restore_table(cap)
+    replayed = 0
+    for room, jseq, entry, deadline in records:
+        replay(room, jseq, entry, deadline)
+        replayed += 1
+    now = time.time()
+    for room, r in rooms.items():
+        transport.open(room)
+        r.dirty = True   # first broadcast after restore sends full state
+        r.away = {p.sid: now for p in r.seats}   # everyone reconnects with a new sid
+        if r.state in BETTING_STATES and r.turn_deadline and r.seats:
+            r.turn_timer = transport.schedule(max(0, r.turn_deadline - now), post, room,
+                                              on_turn_timeout, r.turn_deadline)
+    if rooms:
+        print(f'restored {len(rooms)} tables ({replayed} journaled events) '
+              f'in {time.perf_counter() - t:.2f}s')
+    return caps
+
+def start():
+    # after bind(): open the hand log and the journal, restore tables,
+    # background writers; the transport starts router delivery. Importing
+    # this module creates no files
+    global hand_log, journal, checkpointer
+    if HAND_LOG: hand_log = HandLog(HAND_LOG)
+    if STATE_DIR:
+        journal = Journal(STATE_DIR)
+        checkpointer = Checkpointer(journal)
+        caps = restore()
+        checkpointer.start(caps, lambda: {room: r.jseq for room, r in list(rooms.items())},
+                           request_capture)
+    if HAND_HISTORY: hand_writer.start()
+    deck_pool.start()
+    transport.schedule(SWEEP_SECS, sweep)
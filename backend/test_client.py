@@ -1,5 +1,12 @@
 import socketio
 import time
+import sys
+import json
+import random
+import argparse
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 
 # Create SocketIO client
 sio = socketio.Client()
@@ -28,6 +35,14 @@ def on_player_update(data):
     print(f"Your cards: {data['your_cards']}")
     print(f"Allowed actions: {data['allowed_actions']}")
 
+@sio.on('room_delta')
+def on_room_delta(data):
+    print(f"\nRoom Delta #{data['seq']}: {data['changes']}")
+
+@sio.on('player_delta')
+def on_player_delta(data):
+    print(f"\nPlayer Delta #{data['seq']}: {data['changes']}")
+
 @sio.on('joined')
 def on_joined(data):
     print(f"\nJoined room: {data['room']}")
@@ -72,5 +87,196 @@ def main():
     finally:
         sio.disconnect()
 
+# ------------------------------------------------------------
+# Load generator: python test_client.py --tables 1,10,100 --players 6
+# ------------------------------------------------------------
+# Every synthetic player is its own socketio.Client. The first seat of each
+# table creates the room and deals; everybody answers its turns with a random
+# legal action from allowed_actions. Latency is measured from emitting
+# player_action to the first room update (room_delta) sent after it; seq gaps
+# and actions that never got an update are counted as dropped.
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.actions = 0
+        self.events = 0
+        self.gaps = 0
+        self.errors = {}   # message -> count
+        self.hands = 0
+
+class Bot:
+    def __init__(self, url, table, seat, stats, rng):
+        self.url, self.table, self.seat = url, table, seat
+        self.stats, self.rng = stats, rng
+        self.sio = socketio.Client(reconnection=False)
+        self.sid = None
+        self.pub = {}
+        self.priv = {}
+        self.pub_seq = self.priv_seq = None
+        self.sent_at = None         # perf_counter of the unanswered player_action
+        self.acted_seq = None       # priv seq we last acted on: wait for fresh allowed_actions
+        self.lock = threading.Lock()
+        for name in ('room_update', 'player_update', 'room_delta', 'player_delta',
+                     'room_created', 'joined', 'showdown', 'error', 'message', 'hand_started'):
+            self.sio.on(name, getattr(self, 'on_' + name, self.on_other))
+
+    def connect(self):
+        try:
+            self.sio.connect(self.url)
+        except socketio.exceptions.ConnectionError:
+            return False
+        self.sid = self.sio.get_sid()
+        return True
+
+    def count(self):
+        with self.stats.lock: self.stats.events += 1
+
+    def on_other(self, data=None):
+        self.count()
+
+    def on_error(self, data):
+        self.count()
+        with self.stats.lock:
+            self.stats.errors[data['message']] = self.stats.errors.get(data['message'], 0) + 1
+
+    def on_room_created(self, data):
+        self.count()
+        self.table.room = data['room']
+        self.sio.emit('join_room', {'room': data['room'], 'name': f'T{self.table.n}P{self.seat}'})
+        self.table.created.set()
+
+    def on_room_update(self, data):
+        self.count()
+        with self.lock:
+            self.pub = data; self.pub_seq = data['seq']
+        self.react()
+
+    def on_player_update(self, data):
+        self.count()
+        with self.lock:
+            self.priv = data; self.priv_seq = data['seq']
+        self.react()
+
+    def on_room_delta(self, data):
+        self.count()
+        now = time.perf_counter()
+        with self.lock:
+            if self.pub_seq is not None and data['seq'] != self.pub_seq + 1:
+                with self.stats.lock: self.stats.gaps += 1
+            self.pub_seq = data['seq']
+            self.pub.update(data['changes'])
+            if self.sent_at is not None:
+                with self.stats.lock: self.stats.latencies.append(now - self.sent_at)
+                self.sent_at = None
+        self.react()
+
+    def on_player_delta(self, data):
+        self.count()
+        with self.lock:
+            if self.priv_seq is not None and data['seq'] != self.priv_seq + 1:
+                with self.stats.lock: self.stats.gaps += 1
+            self.priv_seq = data['seq']
+            self.priv.update(data['changes'])
+        self.react()
+
+    def on_showdown(self, data):
+        self.count()
+        if 'results' in data and self.seat == 0: self.table.hand_done()
+
+    def react(self):
+        with self.lock:
+            if self.seat == 0 and not self.table.dealt:
+                if len(self.pub.get('players', [])) == self.table.players:
+                    self.table.dealt = True
+                    self.sio.emit('start_hand', {'room': self.table.room})
+            if self.sent_at is not None or self.pub.get('current_to') != self.sid: return
+            if self.priv_seq == self.acted_seq: return
+            legal = [a for a, ok in self.priv.get('allowed_actions', {}).items() if ok]
+            if not legal: return
+            action = self.rng.choice(legal)
+            self.acted_seq = self.priv_seq
+            self.sent_at = time.perf_counter()
+        self.sio.emit('player_action', {'room': self.table.room, 'action': action,
+                                        'amount': self.rng.randint(1, 4) if action == 'raise' else 0})
+        with self.stats.lock: self.stats.actions += 1
+
+class Table:
+    def __init__(self, n, players, hands):
+        self.n, self.players, self.hands = n, players, hands
+        self.room = None
+        self.host = None
+        self.dealt = False
+        self.played = 0
+        self.created = threading.Event()
+        self.done = threading.Event()
+
+    def hand_done(self):
+        self.played += 1
+        with self.host.stats.lock: self.host.stats.hands += 1
+        if self.played >= self.hands: self.done.set()
+        else: self.host.sio.emit('start_hand', {'room': self.room})
+
+def server_emits(url):
+    try:
+        with urllib.request.urlopen(url + '/emits', timeout=5) as f:
+            return sum(v['emits'] for v in json.load(f).values())
+    except OSError:
+        return None
+
+def pct(xs, q):
+    return xs[min(len(xs)-1, int(q*len(xs)))] * 1000 if xs else float('nan')
+
+def run_load(url, tables, players, hands, timeout, seed):
+    stats = Stats()
+    rng = random.Random(seed)
+    tabs = [Table(t, players, hands) for t in range(tables)]
+    bots = []
+    for t in tabs:
+        t.host = Bot(url, t, 0, stats, random.Random(rng.random()))
+        bots += [t.host] + [Bot(url, t, s, stats, random.Random(rng.random())) for s in range(1, players)]
+    with ThreadPoolExecutor(32) as pool:
+        failed = sum(1 for ok in pool.map(Bot.connect, bots) if not ok)
+    emits_before = server_emits(url)
+
+    t0 = time.perf_counter()
+    for t in tabs:
+        if t.host.sid: t.host.sio.emit('create_room', {})
+    for t in tabs: t.created.wait(timeout)
+    for b in bots:
+        if b.seat and b.sid and b.table.room:
+            b.sio.emit('join_room', {'room': b.table.room, 'name': f'T{b.table.n}P{b.seat}'})
+    deadline = time.time() + timeout
+    for t in tabs: t.done.wait(max(0, deadline - time.time()))
+    elapsed = time.perf_counter() - t0
+    emits_after = server_emits(url)
+    time.sleep(1)   # let updates for the last actions land before counting them lost
+
+    lost = sum(1 for b in bots if b.sent_at is not None)
+    lat = sorted(stats.latencies)
+    print(f'{tables} tables x {players} players ({len(bots)} clients, {failed} failed to connect)')
+    print(f'  hands        {stats.hands}/{tables*hands} in {elapsed:.1f}s  ({stats.hands/elapsed:.1f}/s)')
+    print(f'  actions      {stats.actions}  ({stats.actions/elapsed:.1f}/s)')
+    print(f'  events in    {stats.events}  ({stats.events/elapsed:.0f}/s)')
+    if emits_before is not None and emits_after is not None:
+        print(f'  server emits {emits_after - emits_before}  ({(emits_after - emits_before)/elapsed:.0f}/s)')
+    print(f'  latency ms   p50 {pct(lat, .5):.1f}  p95 {pct(lat, .95):.1f}  p99 {pct(lat, .99):.1f}'
+          f'  max {lat[-1]*1000 if lat else float("nan"):.1f}')
+    print(f'  dropped      {stats.gaps} seq gaps, {lost} actions without update, errors {stats.errors}')
+    with ThreadPoolExecutor(32) as pool:
+        list(pool.map(lambda b: b.sid and b.sio.disconnect(), bots))
+
 if __name__ == '__main__':
-    main()
+    if len(sys.argv) == 1:
+        main()
+    else:
+        ap = argparse.ArgumentParser(description='Socket.IO load generator')
+        ap.add_argument('--url', default='http://localhost:5000')
+        ap.add_argument('--tables', default='1,10,100', help='comma separated table counts, one run each')
+        ap.add_argument('--players', type=int, default=6)
+        ap.add_argument('--hands', type=int, default=10, help='hands per table')
+        ap.add_argument('--timeout', type=float, default=120, help='seconds per run')
+        ap.add_argument('--seed', type=int, default=1)
+        a = ap.parse_args()
+        for n in map(int, a.tables.split(',')):
+            run_load(a.url, n, a.players, a.hands, a.timeout, a.seed)
@@ -0,0 +1,47 @@
+import threading
+from actors import RoomActor, shared
+
+def inline(fn):
+    fn()
+
+def test_events_run_in_submit_order():
+    a, seen = RoomActor(inline), []
+    for i in range(5): a.submit(seen.append, i)
+    assert seen == [0, 1, 2, 3, 4] and not a.running
+
+def test_event_submitted_while_running_waits_its_turn():
+    a, seen = RoomActor(inline), []
+    def first():
+        a.submit(seen.append, 'second')
+        seen.append('first')
+    a.submit(first)
+    assert seen == ['first', 'second']
+
+def test_posting_to_another_room_does_not_run_it_inline():
+    spawned, seen = [], []
+    a, b = RoomActor(spawned.append), RoomActor(spawned.append)
+    def on_a():
+        b.submit(seen.append, 'b')
+        seen.append('a done')
+    a.submit(on_a)
+    assert seen == ['a done'] and spawned == [b.drain] and b.running
+    b.submit(seen.append, 'b again')   # queued behind the runner
+    t = threading.Thread(target=spawned[0]); t.start(); t.join()
+    assert seen == ['a done', 'b', 'b again'] and not b.running
+
+def test_a_failing_event_does_not_stop_the_mailbox(capsys):
+    a, seen = RoomActor(inline), []
+    a.submit(lambda: 1 / 0)
+    a.submit(seen.append, 'next')
+    assert seen == ['next']
+    assert 'ZeroDivisionError' in capsys.readouterr().err
+
+def test_a_shared_thread_spawns_a_runner_for_every_room():
+    spawned, seen = [], []
+    a = RoomActor(spawned.append)
+    def timer_thread():
+        a.submit(seen.append, 'timeout')
+    t = threading.Thread(target=shared(timer_thread)); t.start(); t.join()
+    assert seen == [] and spawned == [a.drain] and a.running
+    spawned[0]()
+    assert seen == ['timeout'] and not a.running
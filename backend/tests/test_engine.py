@@ -0,0 +1,140 @@
+import random
+from deck import shuffle
+from engine import Room, add_player, remove_player, rebind_player, start_hand, act, fold_out, compute_allowed_actions
+
+def table(*chips):
+    r = Room()
+    for i, c in enumerate(chips):
+        add_player(r, f's{i}', f'P{i}', c)
+    return r
+
+def passive(r, sid, rng):
+    allowed = compute_allowed_actions(r, sid)
+    return ('check' if allowed['check'] else 'call'), 0
+
+def mixed(r, sid, rng):
+    allowed = compute_allowed_actions(r, sid)
+    options = [a for a, ok in allowed.items() if ok]
+    action = rng.choice(options)
+    return action, rng.randint(1, 20) if action == 'raise' else 0
+
+def play_hand(r, bot, rng, max_actions=500):
+    out = []
+    assert start_hand(r, out, deck=shuffle(rng.randbytes(32))) is None
+    for _ in range(max_actions):
+        if r.state == 'waiting': return out
+        sid = r.seats[r.current_to_idx].sid
+        action, amount = bot(r, sid, rng)
+        assert act(r, sid, action, amount, out) is None
+    raise AssertionError(f'hand never ended: state {r.state}, pending {r.pending}')
+
+def test_busted_seat_sits_out():
+    # s2 has no chips and is not a blind: it must not hold up the betting
+    r = table(50, 50, 0, 50)
+    r.dealer_idx = 3   # the deal moves it to s0: s1, s3 post the blinds
+    out = play_hand(r, passive, random.Random(1))
+    assert any(ev[0] == 'hand_end' for ev in out)
+    busted = r.by_sid['s2']
+    assert busted.cards == [] and not busted.in_hand and busted.chips == 0
+    assert sum(p.chips for p in r.seats) == 150
+
+def test_busted_seats_never_blind_or_act():
+    rng = random.Random(2)
+    r = table(0, 40, 0, 40, 0)
+    for _ in range(50):
+        out = play_hand(r, mixed, rng)
+        assert sum(p.chips for p in r.seats) == 80
+        for p in r.seats:
+            if p.sid in ('s0', 's2', 's4'):
+                assert p.chips == 0 and p.cards == []
+        if sum(1 for p in r.seats if p.chips) < 2: break
+
+def test_no_hand_without_two_stacks():
+    r = table(50, 0, 0)
+    assert start_hand(r, []) == 'Need at least 2 players'
+
+def test_chips_conserved_over_many_hands():
+    rng = random.Random(3)
+    r = table(*[50]*6)
+    for _ in range(300):
+        if sum(1 for p in r.seats if p.chips) < 2: break
+        play_hand(r, mixed, rng)
+        assert sum(p.chips for p in r.seats) == 300
+        assert r.pot == 0
+
+def test_leaving_mid_hand_keeps_chips_in_the_pot():
+    # a seat that leaves mid-hand folds; its bets stay in the pot and it is
+    # removed once the hand is over
+    rng = random.Random(4)
+    for _ in range(200):
+        r = table(*[rng.randint(5, 60) for _ in range(rng.randint(3, 6))])
+        total = sum(p.chips for p in r.seats)
+        out = []
+        start_hand(r, out, deck=shuffle(rng.randbytes(32)))
+        gone = {}
+        for _ in range(500):
+            if r.state == 'waiting': break
+            if rng.random() < 0.2:
+                p = rng.choice(r.seats)
+                fold_out(r, p.sid, out)
+                gone[p.sid] = p
+            else:
+                sid = r.seats[r.current_to_idx].sid
+                action, amount = mixed(r, sid, rng)
+                assert act(r, sid, action, amount, out) is None
+        assert r.state == 'waiting' and r.pot == 0
+        assert sum(p.chips for p in r.seats) == total
+        for sid in gone: remove_player(r, sid)
+        assert sum(p.chips for p in r.seats) + sum(p.chips for p in gone.values()) == total
+
+def test_leave_out_of_turn_ends_the_hand():
+    r = table(50, 50, 50)
+    out = []
+    start_hand(r, out, deck=shuffle(bytes(32)))
+    cur = r.seats[r.current_to_idx]
+    other = next(p for p in r.seats if p is not cur)
+    fold_out(r, other.sid, out)
+    assert r.state == 'preflop' and not other.in_hand
+    assert act(r, cur.sid, 'fold', 0, out) is None
+    assert r.state == 'waiting'
+    end = next(ev for ev in out if ev[0] == 'hand_end')
+    assert end[2] == r.small_blind + r.big_blind   # the blinds, the leaver's one included
+    assert sum(p.chips for p in r.seats) == 150
+
+def test_rebound_seat_plays_on_under_the_new_sid():
+    r = table(50, 50)
+    out = []
+    start_hand(r, out, record=True, deck=shuffle(bytes(32)))
+    old = r.seats[r.current_to_idx]
+    rebind_player(r, old.sid, 'new')
+    assert r.by_sid['new'] is old and old.sid == 'new'
+    assert act(r, 'new', 'call', 0, out) is None
+    assert old.committed == r.big_blind
+
+def test_short_big_blind_leaves_the_small_blind_the_bet():
+    # 10/20 blinds, the big blind has only 5: the bet to match is the small blind's 10
+    r = table(500, 500, 5)
+    r.small_blind, r.big_blind = 10, 20
+    r.dealer_idx = 2   # the deal moves it to s0: s1 posts 10, s2 is all-in for 5
+    out = []
+    start_hand(r, out, deck=shuffle(bytes(32)))
+    sb, bb, button = r.by_sid['s1'], r.by_sid['s2'], r.by_sid['s0']
+    assert (sb.contribution, bb.contribution, r.current_bet) == (10, 5, 10)
+    assert r.seats[r.current_to_idx] is button
+    allowed = compute_allowed_actions(r, 's0')
+    assert allowed['call'] and not allowed['check']
+    assert act(r, 's0', 'check', 0, out) == 'Cannot check, must call/raise'
+    assert act(r, 's0', 'call', 0, out) is None
+    assert r.state == 'flop' and r.pot == 25
+    assert (button.chips, sb.chips) == (490, 490)
+
+def test_offered_actions_are_accepted_with_short_stacks():
+    # tournament blinds against stacks that often cannot cover them
+    rng = random.Random(5)
+    for _ in range(300):
+        r = table(*[rng.choice((3, 8, 15, 40, 200)) for _ in range(rng.randint(2, 5))])
+        r.small_blind, r.big_blind = 10, 20
+        total = sum(p.chips for p in r.seats)
+        out = play_hand(r, mixed, rng)   # asserts act() takes every offered action
+        assert sum(p.chips for p in r.seats) == total and r.pot == 0
+        assert all(p.chips >= 0 for p in r.seats)
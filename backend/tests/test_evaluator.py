@@ -0,0 +1,85 @@
+import itertools, random
+from engine import best7, eval5
+from evaluator import evaluate, rank_hands
+
+# the evaluator best7 replaced: score all 21 five-card subsets, keep the
+# first best one. Here on int cards (rank*4 + suit, rank 0 = deuce)
+def old_eval5(cards):
+    vals = sorted([(c >> 2) + 2 for c in cards], reverse=True)
+    sc = {}
+    for c in cards: sc[c & 3] = sc.get(c & 3, 0) + 1
+    flush = max(sc.values()) == 5
+    u = sorted(set(vals), reverse=True)
+    straight = None
+    for i in range(len(u) - 4):
+        w = u[i:i+5]
+        if w[0] - w[4] == 4: straight = w[0]; break
+    if not straight and {14, 5, 4, 3, 2}.issubset(u): straight = 5
+    cnt = {}
+    for v in vals: cnt[v] = cnt.get(v, 0) + 1
+    freq = sorted(((c, v) for v, c in cnt.items()), reverse=True)
+    if straight and flush: return (8, (straight,))
+    if freq[0][0] == 4:
+        four = freq[0][1]; return (7, (four, max(v for v in vals if v != four)))
+    if freq[0][0] == 3 and freq[1][0] == 2: return (6, (freq[0][1], freq[1][1]))
+    if flush: return (5, tuple(vals))
+    if straight: return (4, (straight,))
+    if freq[0][0] == 3:
+        t = freq[0][1]; return (3, (t,) + tuple(v for v in vals if v != t))
+    if freq[0][0] == 2 and freq[1][0] == 2:
+        pairs = sorted([freq[0][1], freq[1][1]], reverse=True)
+        return (2, (pairs[0], pairs[1], max(v for v in vals if v not in pairs)))
+    if freq[0][0] == 2:
+        p = freq[0][1]; return (1, (p,) + tuple(v for v in vals if v != p))
+    return (0, tuple(vals))
+
+def old_best7(seven):
+    best = combo = None
+    for comb in itertools.combinations(seven, 5):
+        s = old_eval5(comb)
+        if best is None or s > best: best, combo = s, list(comb)
+    return best, combo
+
+def c(s):
+    return '23456789TJQKA'.index(s[0]) * 4 + 'cdhs'.index(s[1])
+
+EDGES = [
+    'Ac 2d 3h 4s 5c 9d Kh',   # wheel
+    'Ac 2c 3c 4c 5c 6c Kh',   # six-high straight flush over the steel wheel
+    'Ts Js Qs Ks As 9s 2d',   # royal
+    'Kc Kd Kh 7s 7c 7d 2h',   # two trips: full house, kings full
+    'Qc Qd 9h 9s 4c 4d Ah',   # three pairs
+    '8c 8d 8h 8s Kc Kd Kh',   # quads with trips beside
+    '2h 5h 7h 9h Jh Kh Ah',   # seven hearts
+    '9c Td Jh Qs Kc Ad 2h',   # broadway with an extra card
+    '3c 4d 6h 8s Tc Qd Ah',   # nothing
+]
+
+def test_edge_cases_match_the_old_evaluator():
+    for hand in EDGES:
+        cards = [c(x) for x in hand.split()]
+        assert best7(cards) == old_best7(cards), hand
+
+def test_random_hands_match_the_old_evaluator():
+    rng = random.Random(18)
+    deck = list(range(52))
+    for _ in range(5000):
+        cards = rng.sample(deck, 7)
+        assert best7(cards) == old_best7(cards)
+
+def test_five_cards_match_and_order_agrees():
+    rng = random.Random(19)
+    deck = list(range(52))
+    for _ in range(3000):
+        a, b = rng.sample(deck, 5), rng.sample(deck, 5)
+        assert eval5(a) == old_eval5(a)
+        assert (evaluate(a) > evaluate(b)) == (old_eval5(a) > old_eval5(b))
+
+def test_rank_hands_orders_by_best_seven():
+    rng = random.Random(20)
+    for _ in range(500):
+        cards = rng.sample(range(52), 5 + 2*6)
+        board, hands = cards[:5], {i: cards[5+2*i:7+2*i] for i in range(6)}
+        ranked = rank_hands(board, hands)
+        old = [old_best7(board + hands[i])[0] for i, _, _ in ranked]
+        assert old == sorted(old, reverse=True)
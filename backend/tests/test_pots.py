@@ -0,0 +1,35 @@
+import random
+from pots import build_pots, split
+
+def test_layers_by_all_in_level():
+    # seat 0 all-in for 10, seat 1 for 30, seat 2 covers; seat 3 folded after 5
+    pots = build_pots([10, 30, 50, 5], [True, True, True, False])
+    assert pots == [(35, [0, 1, 2]), (40, [1, 2]), (20, [2])]
+
+def test_unmatched_bet_joins_the_top_layer():
+    assert build_pots([20, 50, 0], [True, False, False]) == [(70, [0])]
+
+def test_dead_money_without_a_live_level():
+    assert build_pots([0, 10], [True, False]) == [(10, [0])]
+
+def test_build_and_split_conserve_chips():
+    rng = random.Random(7)
+    for _ in range(2000):
+        nb = rng.randint(2, 9)
+        committed = [rng.choice((0, rng.randint(1, 200))) for _ in range(nb)]
+        live = [rng.random() < 0.6 for _ in range(nb)]
+        if not any(live): live[rng.randrange(nb)] = True
+        pots = build_pots(committed, live)
+        assert sum(a for a, _ in pots) == sum(committed)
+        for _, eligible in pots:
+            assert eligible and all(live[i] for i in eligible)
+        seats = [i for i in range(nb) if live[i]]
+        ranked = [(i, rng.randint(0, 3)) for i in seats]
+        ranked.sort(key=lambda x: -x[1])
+        won = split(pots, ranked, rng.randrange(nb), nb)
+        assert sum(won.values()) == sum(committed)
+        assert all(live[i] for i in won)
+
+def test_odd_chip_goes_left_of_the_button():
+    won = split([(5, [0, 1])], [(0, 9), (1, 9)], 1, 3)
+    assert won == {1: 3, 0: 2}
@@ -0,0 +1,25 @@
+from preflop import TABLE, TIES, hand_class, class_name, combos, heads_up, vs_random
+
+def c(s):
+    return '23456789TJQKA'.index(s[0]) * 4 + 'cdhs'.index(s[1])
+
+def test_classes_cover_every_hand_once():
+    seen = {}
+    for i in range(169):
+        for c1, c2 in combos(i):
+            assert hand_class(c1, c2) == hand_class(c2, c1) == i
+            seen[c1, c2] = i
+    assert len(seen) == 52 * 51 // 2
+    assert [class_name(hand_class(c('As'), c(x))) for x in ('Ad', 'Ks', 'Kd')] == ['AA', 'AKs', 'AKo']
+
+def test_table_lookups():
+    assert TABLE is not None and TABLE.shape == TIES.shape == (170, 169)
+    aa, kk = [c('As'), c('Ah')], [c('Ks'), c('Kh')]
+    res = heads_up([aa, kk])
+    assert 0.79 < res['equity'][0] < 0.84
+    assert abs(sum(res['equity']) - 1) < 1e-6
+    assert abs(sum(res['win']) + res['tie'][0] - 1) < 1e-6 and 0 < res['tie'][0] < 0.01
+    same = heads_up([[c('Ac'), c('Kd')], [c('Ah'), c('Ks')]])   # mostly split
+    assert same['tie'][0] > 0.9 and abs(same['win'][0] - same['win'][1]) < 0.02
+    assert heads_up([aa, kk], dead=[c('Ad')]) is None   # not the spot the table holds
+    assert vs_random(aa) > 0.84 and vs_random([c('7c'), c('2d')]) < 0.36
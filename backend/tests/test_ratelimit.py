@@ -0,0 +1,47 @@
+from ratelimit import Buckets, Limiter
+
+def test_burst_then_refill():
+    b = Buckets(2, 3)
+    assert [b.allow('s', 0.0) for _ in range(4)] == [True, True, True, False]
+    assert not b.allow('s', 0.25)   # half a token back
+    assert b.allow('s', 0.5)
+    assert not b.allow('s', 0.5)
+
+def test_refill_stops_at_burst():
+    b = Buckets(10, 2)
+    b.allow('s', 0.0)
+    assert [b.allow('s', 100.0) for _ in range(3)] == [True, True, False]
+
+def test_keys_are_independent_and_forgotten():
+    b = Buckets(1, 1)
+    assert b.allow('a', 0.0) and b.allow('b', 0.0)
+    assert not b.allow('a', 0.0)
+    b.forget('a')
+    assert b.allow('a', 0.0)
+
+def test_capped_buckets_drop_least_recently_used():
+    b = Buckets(1, 1, max_keys=2)
+    b.allow('a', 0.0); b.allow('b', 0.0)
+    assert not b.allow('a', 0.0)   # a is now the most recent
+    b.allow('c', 0.0)              # evicts b
+    assert list(b.state) == ['a', 'c']
+    for i in range(1000): b.allow(f'fake{i}', 0.0)
+    assert len(b.state) == 2
+
+def test_limiter_charges_sid_and_room():
+    lim = Limiter({'act': (1, 2)}, room_limit=(1, 3))
+    assert lim.allow('act', 's1', 'r') and lim.allow('act', 's1', 'r')
+    assert not lim.allow('act', 's1', 'r')      # s1 is out of tokens
+    assert lim.allow('act', 's2', 'r')          # the room's third token
+    assert not lim.allow('act', 's3', 'r')      # the room is out
+    assert lim.allow('unlisted', 's1')          # no per-event limit, no room
+    lim.forget_sid('s1'); lim.forget_room('r')
+    assert lim.allow('act', 's1', 'r')
+
+def test_creation_is_limited_per_address_across_connections():
+    lim = Limiter({'create': (1, 1)}, addr_limits={'create': (1, 2)})
+    assert lim.allow('create', 's1', addr='a') and lim.allow('create', 's2', addr='a')
+    assert not lim.allow('create', 's3', addr='a')   # a fresh sid does not help
+    assert lim.allow('create', 's4', addr='b')
+    assert lim.allow('create', 's5') and lim.allow('create', 's6')
+    assert not lim.allow('create', 's7')             # no address: one shared bucket
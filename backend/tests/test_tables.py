@@ -0,0 +1,189 @@
+import collections
+import pytest
+import tables
+
+class FakeTransport:
+    # runs posted events when drained; timers are only collected
+    def __init__(self):
+        self.queue, self.sent, self.timers = collections.deque(), [], []
+    def send(self, event, payload, to): self.sent.append((event, payload, to))
+    def submit(self, room, fn, *args): self.queue.append((fn, args))
+    def schedule(self, delay, fn, *args):
+        self.timers.append((fn, args)); return len(self.timers)
+    def cancel(self, handle): pass
+    def open(self, room): pass
+    def close(self, room): pass
+    def spawn(self, fn, *args): pass
+    def queued(self): return len(self.queue)
+    def drain(self):
+        while self.queue:
+            fn, args = self.queue.popleft()
+            fn(*args)
+
+@pytest.fixture
+def t(monkeypatch):
+    monkeypatch.setattr(tables, 'HAND_HISTORY', False)
+    monkeypatch.setattr(tables, 'limiter', None)
+    tr = FakeTransport()
+    tables.bind(tr)
+    yield tr
+    for room in list(tables.rooms): del tables.rooms[room]
+    tables.tournaments.clear()
+
+def event(t, room, fn, sid, *args):
+    tables.dispatch(room, fn, sid, *args)
+    t.drain()
+
+def table_with(t, *chips):
+    room = tables.make_room()
+    for i, c in enumerate(chips):
+        event(t, room, tables.handle_join, f's{i}', {'name': f'P{i}'})
+        tables.rooms[room].by_sid[f's{i}'].chips = c
+    return room, tables.rooms[room]
+
+def play_out(t, room, r):
+    for _ in range(200):
+        if r.state == 'waiting': return
+        sid = r.seats[r.current_to_idx].sid
+        allowed = tables.compute_allowed_actions(r, sid)
+        event(t, room, tables.handle_action, sid, {'action': 'check' if allowed['check'] else 'call'})
+    raise AssertionError('hand never ended')
+
+def test_full_hand_with_a_busted_seat_and_a_mid_hand_leave(t):
+    room, r = table_with(t, 50, 0, 50, 50)
+    event(t, room, tables.handle_start, 's0')
+    assert r.state == 'preflop' and r.by_sid['s1'].cards == []
+    cur = r.seats[r.current_to_idx].sid
+    event(t, room, tables.handle_action, cur, {'action': 'raise', 'amount': 10})
+    event(t, room, tables.handle_leave, cur)   # its 12 stay in the pot
+    assert cur in r.by_sid and not r.by_sid[cur].in_hand
+    play_out(t, room, r)
+    assert cur not in r.by_sid   # removed with the hand over
+    assert sum(p.chips for p in r.seats) == 150 - 38 and r.pot == 0   # it took only its other 38
+
+def test_turn_timer_times_out_a_seat_reclaimed_under_a_new_sid(t):
+    room, r = table_with(t, 50, 50, 50)
+    event(t, room, tables.handle_start, 's0')
+    seat = r.seats[r.current_to_idx]
+    fn, args = t.timers[-1]
+    assert args[1:] == (tables.on_turn_timeout, r.turn_deadline)
+    old = seat.sid
+    event(t, room, tables.handle_disconnect, old)
+    event(t, room, tables.handle_join, 'back', {'name': seat.name, 'token': r.tokens[old]})
+    assert seat.sid == 'back' and t.timers[-1] == (fn, args)   # the reclaim did not re-arm it
+    fn(*args); t.drain()
+    assert not seat.in_hand and r.seats[r.current_to_idx] is not seat
+
+def test_reconnecting_player_reclaims_the_seat(t):
+    room, r = table_with(t, 50, 50)
+    event(t, room, tables.handle_start, 's0')
+    event(t, room, tables.handle_disconnect, 's1')
+    seat, token = r.by_sid['s1'], r.tokens['s1']
+    event(t, room, tables.handle_join, 'thief', {'name': 'P1'})
+    event(t, room, tables.handle_join, 'guess', {'name': 'P1', 'token': 'x' * 32})
+    assert r.by_sid['s1'] is seat and 's1' in r.away   # the name alone takes nothing
+    assert token not in (r.tokens['thief'], r.tokens['guess'])   # both sat down as new players
+    event(t, room, tables.handle_join, 'new', {'name': 'P1', 'token': token})
+    assert r.by_sid['new'] is seat and 's1' not in r.by_sid and 's1' not in r.away
+    assert r.tokens['new'] == token
+
+def test_equity_only_for_an_all_in_once_the_hand_is_over(t):
+    room, r = table_with(t, 50, 50)
+    event(t, room, tables.handle_start, 's0')
+    for sid in ('s0', 'watcher'):   # a seat or a second socket sees nothing mid-hand
+        event(t, room, tables.handle_equity, sid)
+        assert t.sent[-1][0] == 'error'
+    event(t, room, tables.handle_action, r.seats[r.current_to_idx].sid, {'action': 'raise', 'amount': 100})
+    event(t, room, tables.handle_action, r.seats[r.current_to_idx].sid, {'action': 'call'})
+    assert r.state == 'waiting'   # heads-up all-in preflop: answered from the table
+    event(t, room, tables.handle_equity, 'watcher')
+    assert t.sent[-1][0] == 'equity' and t.sent[-1][2] == 'watcher'
+    assert t.sent[-1][1]['state'] == 'preflop' and t.sent[-1][1]['community'] == []
+
+def test_too_many_tables_evict_empty_and_away_ones_first(t, monkeypatch):
+    monkeypatch.setattr(tables, 'MAX_ROOMS', 2)
+    live, _ = table_with(t, 50)                  # least recently used, but played at
+    empty = tables.make_room()
+    away, _ = table_with(t, 50)
+    event(t, away, tables.handle_disconnect, 's0')
+    newer, _ = table_with(t, 50)
+    tables.sweep(); t.drain()
+    assert set(tables.rooms) == {live, newer}
+    assert ('room_closed', {'room': away, 'reason': 'lru'}, away) in t.sent
+
+def tourney(t, n):
+    tables.create_tournament('owner', {})
+    tid = t.sent[-1][1]['tournament']
+    for i in range(n): tables.register_tournament(f'p{i}', {'tournament': tid, 'name': f'P{i}'})
+    tables.start_tournament('owner', {'tournament': tid})
+    t.drain()
+    return tables.tournaments[tid]
+
+def test_tournament_seat_goes_back_to_its_token(t):
+    tm = tourney(t, 2)
+    room, r = next(iter(tables.rooms.items()))
+    token = next(p for e, p, to in t.sent if e == 'seated' and to == 'p0')['token']
+    event(t, room, tables.handle_disconnect, 'p0')
+    event(t, room, tables.handle_join, 'thief', {'name': 'P0'})
+    assert 'thief' not in r.by_sid and 'thief' not in tm.entries   # only watches
+    event(t, room, tables.handle_join, 'back', {'name': 'P0', 'token': token})
+    assert 'back' in r.by_sid and 'p0' not in r.by_sid
+    assert tm.entries['back'] == 'P0' and 'p0' not in tm.entries and tm.at['back'] == room
+    assert tm.board.chips('back') == r.by_sid['back'].chips
+
+def test_unstarted_tournaments_expire(t, monkeypatch):
+    tables.create_tournament('owner', {})
+    tid = t.sent[-1][1]['tournament']
+    tables.register_tournament('p0', {'tournament': tid, 'name': 'P0'})
+    tables.sweep()
+    assert tid in tables.tournaments
+    monkeypatch.setattr(tables, 'TOURNEY_EXPIRE_SECS', 0)
+    tables.sweep()
+    assert tid not in tables.tournaments and ('tournament_closed', {'tournament': tid}, 'p0') in t.sent
+
+def test_abandoned_tournaments_close_their_tables(t, monkeypatch):
+    tm = tourney(t, 2)
+    room = next(iter(tables.rooms))
+    monkeypatch.setattr(tables, 'TOURNEY_EXPIRE_SECS', 0)
+    event(t, room, tables.handle_disconnect, 'p0')
+    tables.sweep(); t.drain()
+    assert tm.id in tables.tournaments   # p1 is still there
+    event(t, room, tables.handle_disconnect, 'p1')
+    tables.sweep(); t.drain()
+    assert tm.id not in tables.tournaments and room not in tables.rooms
+
+def table_state(r):
+    return ([(p.sid, p.name, p.chips, p.cards, p.in_hand, p.contribution, p.has_acted, p.committed)
+             for p in r.seats], r.community, bytes(r.deck), r.pot, r.state, r.current_to_idx,
+            r.current_bet, r.turn_deadline, r.tokens)
+
+def test_snapshot_and_journal_restore_the_tables(t, tmp_path, monkeypatch):
+    from snapshots import Journal, Checkpointer
+    monkeypatch.setattr(tables, 'journal', Journal(str(tmp_path)))
+    monkeypatch.setattr(tables, 'STATE_DIR', str(tmp_path))
+    snapped, r = table_with(t, 50, 50, 50)
+    event(t, snapped, tables.handle_start, 's0')
+    event(t, snapped, tables.handle_action, r.seats[r.current_to_idx].sid, {'action': 'raise', 'amount': 6})
+    cp = Checkpointer(tables.journal)
+    cp.jseqs = lambda: {room: r.jseq for room, r in tables.rooms.items()}
+    cp.request = lambda room, reply: reply(room, tables.capture(tables.rooms[room]))
+    cp.checkpoint()
+    # after the snapshot: more of the hand, and a table only the journal knows
+    event(t, snapped, tables.handle_action, r.seats[r.current_to_idx].sid, {'action': 'call'})
+    event(t, snapped, tables.handle_leave, r.seats[r.current_to_idx].sid)
+    journaled, _ = table_with(t, 50, 50)   # stacks as joined: table_with sets others unjournaled
+    event(t, journaled, tables.handle_start, 's1')
+    want = {room: table_state(r) for room, r in tables.rooms.items()}
+    tables.journal.f.write(b'\x60\x00\x00\x00torn')   # killed in the middle of a frame
+    tables.journal.close()
+    tables.journal = Journal(str(tmp_path))   # what start() opens before restoring
+    for room in list(tables.rooms): del tables.rooms[room]
+    t.timers.clear()
+    tables.restore()
+    assert {room: table_state(r) for room, r in tables.rooms.items()} == want
+    r = tables.rooms[snapped]
+    fn, timer = next((fn, args) for fn, args in t.timers if args[0] == snapped)
+    assert timer[1] is tables.on_turn_timeout and timer[-1] == r.turn_deadline
+    cur = r.seats[r.current_to_idx]
+    fn(*timer); t.drain()   # the re-armed deadline still folds whoever was to act
+    assert not cur.in_hand
@@ -0,0 +1,99 @@
+import itertools, random
+from tournament import Leaderboard, Tournament
+
+def started(n, seats=9):
+    t = Tournament('owner', seats)
+    for i in range(n): t.register(f'p{i}', f'P{i}')
+    codes = (f't{i}' for i in itertools.count())
+    err, seating = t.start('owner', lambda: next(codes))
+    assert err is None
+    for room, players in seating.items():
+        for sid, _ in players: assert t.arrived(sid, room)
+    return t, {room: [sid for sid, _ in players] for room, players in seating.items()}
+
+def test_seating_is_within_one():
+    t, tables = started(30)
+    assert sorted(len(s) for s in tables.values()) == [7, 7, 8, 8]
+    assert not t.transit and t.left == 30
+
+def test_only_the_organizer_starts_and_only_once():
+    t = Tournament('owner')
+    t.register('a', 'A')
+    assert t.start('owner', lambda: 't')[0] == 'Need at least 2 players'
+    t.register('b', 'B')
+    assert t.start('a', lambda: 't')[0] == 'Only the organizer can start the tournament'
+    assert t.start('owner', lambda: 't')[0] is None
+    assert t.register('c', 'C') == 'Tournament already started'
+
+def test_a_token_takes_the_entry_to_a_new_connection():
+    t = Tournament('owner')
+    t.register('a', 'A'); t.register('b', 'B')
+    token = t.tokens['a']
+    t.register('a2', 'Someone', token)   # before the start: re-registering
+    assert t.entries == {'a2': 'A', 'b': 'B'} and t.tokens['a2'] == token
+    t.start('owner', lambda: 't')
+    assert t.arrived('a2', 't') and t.where(token) == ('t', 1500)
+    t.board.update('a2', 1700)
+    t.rebind('a2', 'a3')   # a seated player back (tables.reclaim)
+    assert list(t.entries) == ['a3', 'b'] and t.at == {'a3': 't'} and list(t.transit) == ['b']
+    assert t.board.top(1) == [('a3', 1700)] and t.where(token) == ('t', 1700)
+
+def test_long_table_sends_players_to_the_short_one():
+    t, tables = started(18)   # 9 and 9
+    a, b = sorted(tables)
+    bust = tables[a][:3]
+    moves, wake = t.checkin(a, [(s, 1500) for s in tables[a][3:]], [(s, 0) for s in bust])
+    assert moves == [] and wake is None   # a is the short one now
+    moves, wake = t.checkin(b, [(s, 1500) for s in tables[b]], [])
+    assert [to for _, to in moves] == [a] and wake is None   # 9 vs 6: one over leaves 8 vs 7
+    assert t.count == {a: 7, b: 8}
+    assert [sid for sid, _ in moves] == tables[b][:1]   # the first in the order moves
+
+def test_short_table_breaks_once_the_field_fits():
+    t, tables = started(18, seats=6)   # 6, 6, 6
+    a, b, c = sorted(tables)
+    assert t.checkin(a, [(s, 1500) for s in tables[a][:4]], [(s, 0) for s in tables[a][4:]]) == ([], None)
+    # 12 left fit on two tables: b is the shortest, so it breaks itself
+    moves, wake = t.checkin(b, [(s, 1500) for s in tables[b][:2]], [(s, 0) for s in tables[b][2:]])
+    assert [to for _, to in moves] == [a, a] and wake is None
+    assert t.count == {a: 6, c: 6} and b not in t.breaking
+
+def test_longer_table_wakes_the_shortest_to_break():
+    t, tables = started(18, seats=6)
+    a, b, c = sorted(tables)
+    t.checkin(a, [(s, 1500) for s in tables[a][:2]], [(s, 0) for s in tables[a][2:]])
+    moves, wake = t.checkin(b, [(s, 1500) for s in tables[b][:4]], [(s, 0) for s in tables[b][4:]])
+    assert moves == [] and wake == a and t.breaking == {a}
+    moves, wake = t.checkin(a, [(s, 1500) for s in tables[a][:2]], [])
+    assert sorted(to for _, to in moves) == [b, b] and wake is None
+    assert t.count == {b: 6, c: 6} and not t.breaking
+
+def test_random_play_keeps_invariants():
+    rng = random.Random(11)
+    t, tables = started(60, seats=6)
+    seated = {room: list(sids) for room, sids in tables.items()}
+    while not t.finished:
+        room = rng.choice(sorted(seated))
+        sids = seated[room]
+        bust = [s for s in sids if rng.random() < 0.15][:len(sids) - 1] if t.left > 1 else []
+        keep = [s for s in sids if s not in bust]
+        moves, wake = t.checkin(room, [(s, 1500) for s in keep], [(s, 0) for s in bust])
+        seated[room] = keep
+        for sid, to in moves:
+            if sid in seated[room]: seated[room].remove(sid)
+            assert t.arrived(sid, to)
+            seated.setdefault(to, []).append(sid)
+        seated = {r: s for r, s in seated.items() if s}   # broken tables
+        assert sum(len(s) for s in seated.values()) == t.left
+        assert all(len(s) <= 6 for s in seated.values())
+        assert sorted(seated) == sorted(t.count)
+    assert sorted(t.places.values()) == list(range(1, 61))
+
+def test_leaderboard_ranks():
+    b = Leaderboard()
+    for sid, chips in (('a', 100), ('b', 300), ('c', 200)): b.update(sid, chips)
+    b.update('a', 400)
+    assert b.top(2) == [('a', 400), ('b', 300)]
+    assert [b.rank(s) for s in 'abc'] == [1, 2, 3]
+    b.remove('b')
+    assert b.rank('c') == 2 and b.chips('c') == 200
@@ -0,0 +1,240 @@
+# tournament.py
+# Multi-table tournament bookkeeping: who sits at which table, the blind
+# clock and the leaderboard. Transport-free like engine.py: tables.py owns
+# the rooms and checks each of its tables in here between two hands.
+#
+# A table only gives players away between its own hands, and always to
+# the shortest tables. Once the field fits on one table fewer, the
+# shortest table breaks and its players fill the others; otherwise a
+# table two or more players longer than the shortest one sends players
+# over until they are within one. Tables sit in buckets by player count,
+# so finding the shortest one scans at most `seats` buckets, not every
+# table. Players on their way to a table count for it until they arrive.
+#
+# The blind level follows from the start time, so there is no timer: each
+# table reads blinds() when it deals.
+#
+# Every entry gets a rejoin token at registration, which its tables use as
+# the seat's token. A player who comes back on a new connection shows it to
+# re-register (before the start) or to take its seat back (rebind()).
+import random, secrets, threading, time, uuid
+from bisect import bisect_left, insort
+
+# (small blind, big blind) per level; the last one repeats
+LEVELS = ((10, 20), (15, 30), (25, 50), (50, 100), (75, 150), (100, 200), (150, 300),
+          (200, 400), (300, 600), (400, 800), (600, 1200), (800, 1600), (1000, 2000),
+          (1500, 3000), (2000, 4000), (3000, 6000), (5000, 10000))
+
+class Leaderboard:
+    # every stack in one list sorted high to low; a hand changes only the
+    # stacks at its table, each a bisect out and an insort back in
+    __slots__ = ('keys', 'key')
+
+    def __init__(self):
+        self.keys = []   # (-chips, sid), best first
+        self.key = {}    # sid -> its entry in keys
+
+    def update(self, sid, chips):
+        old, new = self.key.get(sid), (-chips, sid)
+        if old == new: return
+        if old is not None: del self.keys[bisect_left(self.keys, old)]
+        insort(self.keys, new)
+        self.key[sid] = new
+
+    def remove(self, sid):
+        old = self.key.pop(sid, None)
+        if old is not None: del self.keys[bisect_left(self.keys, old)]
+
+    def chips(self, sid):
+        return -self.key[sid][0]
+
+    def rank(self, sid):
+        return bisect_left(self.keys, self.key[sid]) + 1
+
+    def top(self, n):
+        return [(sid, -chips) for chips, sid in self.keys[:n]]
+
+class Tournament:
+    def __init__(self, owner, seats=9, chips=1500, level_secs=300, levels=LEVELS):
+        self.id = str(uuid.uuid4())[:8]
+        self.owner = owner            # sid that may start it
+        self.seats, self.chips, self.level_secs, self.levels = seats, chips, level_secs, levels
+        self.lock = threading.Lock()  # tables check in from their own threads
+        self.entries = {}             # sid -> name
+        self.tokens = {}              # sid -> rejoin token
+        self.at = {}                  # sid -> room it is seated at
+        self.created_at = time.monotonic()
+        self.started_at = None        # monotonic
+        self.finished = False
+        self.left = 0                 # players still in
+        self.places = {}              # sid -> finishing place
+        self.count = {}               # room -> players seated there or on their way
+        self.by_count = [set() for _ in range(seats + 1)]   # player count -> rooms
+        self.transit = {}             # sid -> room it was sent to, until it arrives
+        self.breaking = set()         # rooms asked to break at their next check-in
+        self.board = Leaderboard()
+
+    def register(self, sid, name, token=None):
+        with self.lock:
+            if self.started_at is not None: return 'Tournament already started'
+            old = self._owner(token)
+            if old is not None: self._rebind(old, sid)   # back on a new connection
+            else: self.entries[sid] = name
+            self.tokens.setdefault(sid, secrets.token_hex(16))
+
+    def start(self, sid, new_table):
+        # -> (error, None) or (None, {room: [(sid, name)]}); new_table() -> room code
+        with self.lock:
+            if sid != self.owner: return 'Only the organizer can start the tournament', None
+            if self.started_at is not None: return 'Tournament already started', None
+            if len(self.entries) < 2: return 'Need at least 2 players', None
+            players = list(self.entries.items())
+            random.shuffle(players)
+            n = -(-len(players) // self.seats)
+            seating = {new_table(): [] for _ in range(n)}
+            tables = list(seating)
+            for i, (psid, name) in enumerate(players):   # dealt round the tables: within one of each other
+                room = tables[i % n]
+                seating[room].append((psid, name))
+                self.transit[psid] = room
+                self.board.update(psid, self.chips)
+            for room, ps in seating.items(): self._set_count(room, len(ps))
+            self.left = len(players)
+            self.started_at = time.monotonic()
+            return None, seating
+
+    def blinds(self):
+        # -> (level, small blind, big blind, seconds to the next level)
+        elapsed = time.monotonic() - self.started_at
+        level = min(int(elapsed // self.level_secs), len(self.levels) - 1)
+        sb, bb = self.levels[level]
+        return level, sb, bb, self.level_secs - elapsed % self.level_secs
+
+    def arrived(self, sid, room):
+        # False: the player was sent on elsewhere meanwhile (its table broke)
+        with self.lock:
+            if self.transit.get(sid) != room: return False
+            del self.transit[sid]
+            self.at[sid] = room
+            return True
+
+    def where(self, token):
+        # -> (room, chips) of the player holding token: the table it sits
+        # at or is on its way to; None once it is out
+        with self.lock:
+            sid = self._owner(token)
+            room = self.transit.get(sid) or self.at.get(sid)
+            return (room, self.board.chips(sid)) if room else None
+
+    def rebind(self, sid, new_sid):
+        # the seat's player came back under a new sid (tables.reclaim)
+        with self.lock:
+            self._rebind(sid, new_sid)
+
+    def _owner(self, token):
+        return next((s for s, t in self.tokens.items() if t == token), None) if token else None
+
+    def _rebind(self, sid, new_sid):
+        self.entries = {new_sid if s == sid else s: name for s, name in self.entries.items()}
+        for d in (self.tokens, self.transit, self.at, self.places):
+            if sid in d: d[new_sid] = d.pop(sid)
+        if sid in self.board.key:
+            chips = self.board.chips(sid)
+            self.board.remove(sid)
+            self.board.update(new_sid, chips)
+        if self.owner == sid: self.owner = new_sid
+
+    def checkin(self, room, stacks, busted):
+        # a table between hands. stacks: [(sid, chips)] seated there, first
+        # the ones to move first; busted: [(sid, chips at the start of the
+        # hand)] who lost everything in it. -> (moves [(sid, to room)], a room
+        # to check in next or None)
+        with self.lock:
+            for sid, before in sorted(busted, key=lambda b: b[1]):   # shorter stacks bust first
+                self.places[sid] = self.left
+                self.left -= 1
+                self.board.remove(sid)
+                self.at.pop(sid, None)
+            for sid, chips in stacks: self.board.update(sid, chips)
+            if room not in self.count: return [], None
+            coming = [sid for sid, to in self.transit.items() if to == room]
+            self._set_count(room, len(stacks) + len(coming))
+            if self.left == 1 and stacks:
+                self.places[stacks[0][0]] = 1
+                self.finished = True
+            if len(self.count) == 1: return [], None
+            need = -(-self.left // self.seats)
+            wake = None
+            if len(self.count) > need:
+                short, other = self._shortest(room)
+                if room in self.breaking or (not self.breaking and self.count[room] <= short):
+                    return self._break(room, [sid for sid, _ in stacks] + coming), None
+                if not self.breaking:   # the shortest table breaks when it is between hands
+                    self.breaking.add(other)
+                    wake = other
+            else:
+                self.breaking.discard(room)
+            return self._balance(room, stacks), wake
+
+    def _set_count(self, room, n):
+        old = self.count.get(room)
+        if old is not None: self.by_count[old].discard(room)
+        self.count[room] = n
+        self.by_count[n].add(room)
+
+    def _shortest(self, exclude):
+        # -> (count, room): the shortest table but `exclude`, passing over
+        # one about to break while there is any other
+        spare = None
+        for n, bucket in enumerate(self.by_count):
+            for room in bucket:
+                if room == exclude: continue
+                if room not in self.breaking: return n, room
+                if spare is None: spare = n, room
+        return spare
+
+    def _send(self, sid, room):
+        self.transit[sid] = room
+        self._set_count(room, self.count[room] + 1)
+
+    def _break(self, room, sids):
+        self.by_count[self.count.pop(room)].discard(room)
+        self.breaking.discard(room)
+        moves = []
+        for sid in sids:
+            _, to = self._shortest(room)
+            self._send(sid, to)
+            moves.append((sid, to))
+        return moves
+
+    def _balance(self, room, stacks):
+        moves = []
+        for sid, _ in stacks:
+            short, to = self._shortest(room)
+            if self.count[room] - short < 2: break
+            self._set_count(room, self.count[room] - 1)
+            self._send(sid, to)
+            moves.append((sid, to))
+        return moves
+
+    def standings(self, sids=(), top=10):
+        # what a table shows after each hand: the clock, the top of the
+        # leaderboard and the ranks of its own players
+        with self.lock:
+            out = {'tournament': self.id, 'players': len(self.entries),
+                   'players_left': self.left, 'tables': len(self.count),
+                   'started': self.started_at is not None, 'finished': self.finished}
+            if self.started_at is None:
+                out['entries'] = list(self.entries.values())
+                return out
+            level, sb, bb, until = self.blinds()
+            out.update({
+                'level': level + 1, 'small_blind': sb, 'big_blind': bb,
+                'next_level_in': round(until),
+                'top': [{'name': self.entries[sid], 'chips': chips} for sid, chips in self.board.top(top)],
+                'ranks': {sid: self.board.rank(sid) for sid in sids if sid in self.board.key},
+            })
+            if self.finished:
+                out['places'] = [{'place': place, 'name': self.entries[sid]}
+                                 for sid, place in sorted(self.places.items(), key=lambda x: x[1])]
+            return out